@@ -38,6 +38,9 @@ class cache_manager {
     /** @var int Cache duration for distractor generation (3 days). */
     const CACHE_TTL_DISTRACTORS = 259200;
 
+    /** @var int Seconds to wait for another process filling the same cache entry. */
+    const FILL_LOCK_TIMEOUT = 120;
+
     /**
      * Get cached AI response if available.
      *
@@ -139,6 +142,27 @@ class cache_manager {
         }
     }
 
+    /**
+     * Acquire the lock that serialises filling one cache entry across processes.
+     *
+     * The holder computes the entry and stores it; other callers block here and then
+     * find it in the cache. If the lock cannot be obtained in time, callers go ahead
+     * without it, so a stuck holder delays but never blocks generation.
+     *
+     * @param string $cachetype Type of cache (topics, questions, distractors)
+     * @param string $cachekey Unique key for the cached item
+     * @return \core\lock\lock|false Lock to release after the entry is stored, or false
+     */
+    public static function get_fill_lock($cachetype, $cachekey) {
+        try {
+            $factory = \core\lock\lock_config::get_lock_factory('local_hlai_quizgen_cache');
+            return $factory->get_lock($cachetype . '_' . $cachekey, self::FILL_LOCK_TIMEOUT);
+        } catch (\Exception $e) {
+            debugging('Cache fill lock unavailable: ' . $e->getMessage(), DEBUG_DEVELOPER);
+            return false;
+        }
+    }
+
     /**
      * Generate cache key for topic analysis.
      *
@@ -147,8 +171,19 @@ class cache_manager {
      * @return string Cache key
      */
     public static function generate_topic_cache_key($content, $courseid) {
-        $normalized = self::normalize_content($content);
-        return 'topic_' . $courseid . '_' . hash('sha256', $normalized);
+        // Fingerprint the set of paragraphs rather than the raw text, so re-uploads that only
+        // change whitespace, letter case or section order still hit the cached analysis.
+        // Split on "\n" only: \R would also match byte 0x85 inside multi-byte UTF-8 characters.
+        $paragraphs = [];
+        foreach (preg_split('/\n\s*\n/', (string)$content) as $paragraph) {
+            $paragraph = self::normalize_content($paragraph);
+            if ($paragraph !== '') {
+                $paragraphs[] = $paragraph;
+            }
+        }
+        sort($paragraphs, SORT_STRING);
+
+        return 'topic_' . $courseid . '_' . hash('sha256', implode("\n", $paragraphs));
     }
 
     /**
@@ -178,6 +213,22 @@ class cache_manager {
         return 'distractor_' . hash('sha256', $key);
     }
 
+    /**
+     * Generate cache key for a complete gateway response.
+     *
+     * The payload is serialised byte for byte: scraped content can hold malformed UTF-8,
+     * which json_encode() rejects, and every such payload would then share one key.
+     *
+     * @param string $operation Gateway operation
+     * @param string $quality Quality mode
+     * @param array $payload Request payload
+     * @return string Cache key
+     */
+    public static function generate_gateway_cache_key($operation, $quality, array $payload) {
+        $key = serialize([$operation, $quality, $payload]);
+        return 'gateway_' . $operation . '_' . hash('sha256', $key);
+    }
+
     /**
      * Clean up expired cache entries.
      *
@@ -36,6 +36,32 @@ namespace local_hlai_quizgen;
  * Content extractor class.
  */
 class content_extractor {
+    /** @var array HTML-to-markdown rewrite rules (pattern => replacement), applied in order. */
+    const HTML_TO_TEXT_RULES = [
+        // Convert headings to markdown style.
+        '/<h1[^>]*>(.*?)<\/h1>/is' => "\n\n# $1\n\n",
+        '/<h2[^>]*>(.*?)<\/h2>/is' => "\n\n## $1\n\n",
+        '/<h3[^>]*>(.*?)<\/h3>/is' => "\n\n### $1\n\n",
+        '/<h4[^>]*>(.*?)<\/h4>/is' => "\n\n#### $1\n\n",
+        '/<h5[^>]*>(.*?)<\/h5>/is' => "\n\n##### $1\n\n",
+        '/<h6[^>]*>(.*?)<\/h6>/is' => "\n\n###### $1\n\n",
+        // Convert lists.
+        '/<li[^>]*>(.*?)<\/li>/is' => "- $1\n",
+        '/<\/ul>|<\/ol>/is' => "\n",
+        // Convert paragraphs.
+        '/<p[^>]*>(.*?)<\/p>/is' => "$1\n\n",
+        // Convert line breaks.
+        '/<br\s*\/?>/i' => "\n",
+        // Preserve strong/bold as emphasis.
+        '/<(strong|b)[^>]*>(.*?)<\/\1>/is' => "**$2**",
+    ];
+
+    /** @var string[] File extensions accepted for direct upload. */
+    const ALLOWED_UPLOAD_EXTENSIONS = ['pdf', 'docx', 'pptx', 'txt'];
+
+    /** @var string[] URL schemes that may be fetched for URL resources. */
+    const FETCHABLE_URL_SCHEMES = ['http', 'https'];
+
     /**
      * Extract content from multiple sources.
      *
@@ -529,14 +555,16 @@ class content_extractor {
             // Extract cell values.
             preg_match_all('/<v>([^<]*)<\/v>/i', $sheetxml, $matches);
             if (!empty($matches[1])) {
+                $cells = [];
                 foreach ($matches[1] as $value) {
                     // Check if it's a shared string reference.
                     if (is_numeric($value) && isset($sharedstrings[(int)$value])) {
-                        $text .= $sharedstrings[(int)$value] . ' ';
+                        $cells[] = $sharedstrings[(int)$value];
                     } else {
-                        $text .= $value . ' ';
+                        $cells[] = $value;
                     }
                 }
+                $text .= implode(' ', $cells) . ' ';
             }
 
             $text .= "\n\n";
@@ -718,19 +746,19 @@ class content_extractor {
         $book = $DB->get_record('book', ['id' => $cm->instance], '*', MUST_EXIST);
         $chapters = $DB->get_records('book_chapters', ['bookid' => $book->id], 'pagenum ASC');
 
-        $text = "# " . $book->name . "\n\n";
+        $parts = ["# " . $book->name . "\n\n"];
         if (!empty($book->intro)) {
-            $text .= self::html_to_structured_text($book->intro) . "\n\n";
+            $parts[] = self::html_to_structured_text($book->intro) . "\n\n";
         }
 
         foreach ($chapters as $chapter) {
             if (!$chapter->hidden) {
-                $text .= "\n\n## Chapter: " . $chapter->title . "\n\n";
-                $text .= self::html_to_structured_text($chapter->content) . "\n";
+                $parts[] = "\n\n## Chapter: " . $chapter->title . "\n\n";
+                $parts[] = self::html_to_structured_text($chapter->content) . "\n";
             }
         }
 
-        return $text;
+        return implode('', $parts);
     }
 
     /**
@@ -745,17 +773,17 @@ class content_extractor {
         $lesson = $DB->get_record('lesson', ['id' => $cm->instance], '*', MUST_EXIST);
         $pages = $DB->get_records('lesson_pages', ['lessonid' => $lesson->id], 'prevpageid ASC');
 
-        $text = "# " . $lesson->name . "\n\n";
+        $parts = ["# " . $lesson->name . "\n\n"];
         if (!empty($lesson->intro)) {
-            $text .= self::html_to_structured_text($lesson->intro) . "\n\n";
+            $parts[] = self::html_to_structured_text($lesson->intro) . "\n\n";
         }
 
         foreach ($pages as $page) {
-            $text .= "\n\n## " . $page->title . "\n\n";
-            $text .= self::html_to_structured_text($page->contents) . "\n";
+            $parts[] = "\n\n## " . $page->title . "\n\n";
+            $parts[] = self::html_to_structured_text($page->contents) . "\n";
         }
 
-        return $text;
+        return implode('', $parts);
     }
 
     /**
@@ -900,7 +928,7 @@ class content_extractor {
 
         // Only fetch from HTTP/HTTPS URLs.
         $scheme = parse_url($url, PHP_URL_SCHEME);
-        if (!in_array($scheme, ['http', 'https'])) {
+        if (!in_array($scheme, self::FETCHABLE_URL_SCHEMES)) {
             return '';
         }
 
@@ -954,10 +982,9 @@ class content_extractor {
             throw new \moodle_exception('error:filetoobig', 'local_hlai_quizgen', '', $maxsize);
         }
 
-        $allowedextensions = ['pdf', 'docx', 'pptx', 'txt'];
         $extension = strtolower(pathinfo($file['name'], PATHINFO_EXTENSION));
 
-        if (!in_array($extension, $allowedextensions)) {
+        if (!in_array($extension, self::ALLOWED_UPLOAD_EXTENSIONS)) {
             throw new \moodle_exception('error:invalidfiletype', 'local_hlai_quizgen');
         }
 
@@ -982,7 +1009,7 @@ class content_extractor {
         $extractionstart = microtime(true);
         debugging("HLAI extract_from_activities START: {$totalactivities} activities to process", DEBUG_DEVELOPER);
 
-        $allcontent = '';
+        $parts = [];
         $processed = 0;
         $totalwords = 0;
 
@@ -1033,12 +1060,12 @@ class content_extractor {
 
                 // CRITICAL: Mark with actual activity name prominently so AI uses it as topic title.
                 // Format: === TOPIC: [Activity Name] ([Type]) ===.
-                $allcontent .= "\n\n=== TOPIC: {$activityname} ({$modulelabel}) ===\n";
-                $allcontent .= "Activity Name: {$activityname}\n";
-                $allcontent .= "Activity Type: {$modulelabel}\n";
-                $allcontent .= "---\n";
-                $allcontent .= $result['text'];
-                $allcontent .= "\n=== END TOPIC ===\n";
+                $parts[] = "\n\n=== TOPIC: {$activityname} ({$modulelabel}) ===\n" .
+                    "Activity Name: {$activityname}\n" .
+                    "Activity Type: {$modulelabel}\n" .
+                    "---\n" .
+                    $result['text'] .
+                    "\n=== END TOPIC ===\n";
             } catch (\Exception $e) {
                 $actduration = round(microtime(true) - $actstart, 2);
                 debugging(
@@ -1057,7 +1084,7 @@ class content_extractor {
             DEBUG_DEVELOPER
         );
 
-        return $allcontent;
+        return implode('', $parts);
     }
 
     /**
@@ -1310,33 +1337,14 @@ class content_extractor {
             return '';
         }
 
-        // Convert headings to markdown style.
-        $html = preg_replace('/<h1[^>]*>(.*?)<\/h1>/is', "\n\n# $1\n\n", $html);
-        $html = preg_replace('/<h2[^>]*>(.*?)<\/h2>/is', "\n\n## $1\n\n", $html);
-        $html = preg_replace('/<h3[^>]*>(.*?)<\/h3>/is', "\n\n### $1\n\n", $html);
-        $html = preg_replace('/<h4[^>]*>(.*?)<\/h4>/is', "\n\n#### $1\n\n", $html);
-        $html = preg_replace('/<h5[^>]*>(.*?)<\/h5>/is', "\n\n##### $1\n\n", $html);
-        $html = preg_replace('/<h6[^>]*>(.*?)<\/h6>/is', "\n\n###### $1\n\n", $html);
-
-        // Convert lists.
-        $html = preg_replace('/<li[^>]*>(.*?)<\/li>/is', "- $1\n", $html);
-        $html = preg_replace('/<\/ul>|<\/ol>/is', "\n", $html);
-
-        // Convert paragraphs.
-        $html = preg_replace('/<p[^>]*>(.*?)<\/p>/is', "$1\n\n", $html);
-
-        // Convert line breaks.
-        $html = preg_replace('/<br\s*\/?>/i', "\n", $html);
-
-        // Preserve strong/bold as emphasis.
-        $html = preg_replace('/<(strong|b)[^>]*>(.*?)<\/\1>/is', "**$2**", $html);
+        // Convert headings, lists, paragraphs, line breaks and emphasis in one pass over the rules.
+        $html = preg_replace(array_keys(self::HTML_TO_TEXT_RULES), array_values(self::HTML_TO_TEXT_RULES), $html);
 
         // Remove remaining HTML tags.
         $text = strip_tags($html);
 
         // Clean up whitespace.
-        $text = preg_replace('/\n{4,}/', "\n\n\n", $text);
-        $text = preg_replace('/ +/', ' ', $text);
+        $text = preg_replace(['/\n{4,}/', '/ +/'], ["\n\n\n", ' '], $text);
 
         return trim($text);
     }
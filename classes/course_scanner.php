@@ -60,14 +60,16 @@ class course_scanner {
         global $DB;
 
         $course = $DB->get_record('course', ['id' => $courseid], '*', MUST_EXIST);
-        $allcontent = '';
+        $parts = [];
         $sources = [];
 
         // 1. Course Summary.
-        $allcontent .= "=== COURSE: " . $course->fullname . " ===\n\n";
+        $block = "=== COURSE: " . $course->fullname . " ===\n\n";
         if (!empty($course->summary)) {
-            $allcontent .= strip_tags($course->summary) . "\n\n";
+            $block .= strip_tags($course->summary) . "\n\n";
         }
+        $parts[] = $block;
+        $contentlength = strlen($block);
         $sources[] = [
             'type' => 'course_summary',
             'name' => $course->fullname,
@@ -84,10 +86,12 @@ class course_scanner {
             }
 
             if (!empty($section->name) || !empty($section->summary)) {
-                $allcontent .= "=== SECTION: " . ($section->name ?: "Section $section->section") . " ===\n\n";
+                $block = "=== SECTION: " . ($section->name ?: "Section $section->section") . " ===\n\n";
                 if (!empty($section->summary)) {
-                    $allcontent .= strip_tags($section->summary) . "\n\n";
+                    $block .= strip_tags($section->summary) . "\n\n";
                 }
+                $parts[] = $block;
+                $contentlength += strlen($block);
                 $sources[] = [
                     'type' => 'section_summary',
                     'name' => $section->name ?: "Section $section->section",
@@ -96,7 +100,7 @@ class course_scanner {
             }
 
             // Check content size limit.
-            if (strlen($allcontent) > self::MAX_CONTENT_SIZE) {
+            if ($contentlength > self::MAX_CONTENT_SIZE) {
                 break;
             }
         }
@@ -104,14 +108,15 @@ class course_scanner {
 
         // 3. Scan all resources (pages, books, etc.) - the actual learning content.
         $resourcescan = self::scan_all_resources($courseid);
-        $allcontent .= $resourcescan['text'];
+        $parts[] = $resourcescan['text'];
         $sources = array_merge($sources, $resourcescan['sources']);
 
         // 4. Scan all activities (lessons, SCORM) - structured learning content.
         $activityscan = self::scan_all_activities($courseid);
-        $allcontent .= $activityscan['text'];
+        $parts[] = $activityscan['text'];
         $sources = array_merge($sources, $activityscan['sources']);
 
+        $allcontent = implode('', $parts);
         $wordcount = str_word_count($allcontent);
 
         return [
@@ -131,7 +136,8 @@ class course_scanner {
     public static function scan_all_resources(int $courseid): array {
         global $DB;
 
-        $allcontent = '';
+        $parts = [];
+        $contentlength = 0;
         $sources = [];
         $modinfo = get_fast_modinfo($courseid);
 
@@ -150,7 +156,7 @@ class course_scanner {
             }
 
             // Check content size limit.
-            if (strlen($allcontent) > self::MAX_CONTENT_SIZE) {
+            if ($contentlength > self::MAX_CONTENT_SIZE) {
                 break;
             }
 
@@ -166,13 +172,9 @@ class course_scanner {
                 $seennames[$namekey] = true;
 
                 // Use TOPIC marker format for AI topic extraction.
-                $modulelabel = ucfirst($cm->modname);
-                $allcontent .= "\n\n=== TOPIC: " . $result['name'] . " (" . $modulelabel . ") ===\n";
-                $allcontent .= "Activity Name: " . $result['name'] . "\n";
-                $allcontent .= "Activity Type: " . $modulelabel . "\n";
-                $allcontent .= "---\n";
-                $allcontent .= $result['text'];
-                $allcontent .= "\n=== END TOPIC ===\n";
+                $block = self::format_topic_block($result['name'], $cm->modname, $result['text']);
+                $parts[] = $block;
+                $contentlength += strlen($block);
 
                 $sources[] = [
                     'type' => $cm->modname,
@@ -184,6 +186,7 @@ class course_scanner {
             }
         }
 
+        $allcontent = implode('', $parts);
         $wordcount = str_word_count($allcontent);
 
         return [
@@ -203,7 +206,8 @@ class course_scanner {
     public static function scan_all_activities(int $courseid): array {
         global $DB;
 
-        $allcontent = '';
+        $parts = [];
+        $contentlength = 0;
         $sources = [];
         $modinfo = get_fast_modinfo($courseid);
         $allcms = $modinfo->get_cms();
@@ -231,7 +235,7 @@ class course_scanner {
             }
 
             // Check content size limit.
-            if (strlen($allcontent) > self::MAX_CONTENT_SIZE) {
+            if ($contentlength > self::MAX_CONTENT_SIZE) {
                 break;
             }
 
@@ -247,13 +251,9 @@ class course_scanner {
                 $seennames[$namekey] = true;
 
                 // Use TOPIC marker format for AI topic extraction.
-                $modulelabel = ucfirst($cm->modname);
-                $allcontent .= "\n\n=== TOPIC: " . $result['name'] . " (" . $modulelabel . ") ===\n";
-                $allcontent .= "Activity Name: " . $result['name'] . "\n";
-                $allcontent .= "Activity Type: " . $modulelabel . "\n";
-                $allcontent .= "---\n";
-                $allcontent .= $result['text'];
-                $allcontent .= "\n=== END TOPIC ===\n";
+                $block = self::format_topic_block($result['name'], $cm->modname, $result['text']);
+                $parts[] = $block;
+                $contentlength += strlen($block);
 
                 $sources[] = [
                     'type' => $cm->modname,
@@ -265,6 +265,7 @@ class course_scanner {
             }
         }
 
+        $allcontent = implode('', $parts);
         $wordcount = str_word_count($allcontent);
 
         return [
@@ -274,6 +275,24 @@ class course_scanner {
         ];
     }
 
+    /**
+     * Format one extracted module as a TOPIC marker block for AI topic extraction.
+     *
+     * @param string $name Module name
+     * @param string $modname Module type (e.g. page, lesson)
+     * @param string $text Extracted text
+     * @return string Marker block
+     */
+    private static function format_topic_block(string $name, string $modname, string $text): string {
+        $modulelabel = ucfirst($modname);
+        return "\n\n=== TOPIC: {$name} ({$modulelabel}) ===\n" .
+            "Activity Name: {$name}\n" .
+            "Activity Type: {$modulelabel}\n" .
+            "---\n" .
+            $text .
+            "\n=== END TOPIC ===\n";
+    }
+
     /**
      * Scan all content in a course (resources + activities).
      *
@@ -46,6 +46,9 @@ class debug_logger {
     /** @var string Log file name */
     const LOG_FILE = 'local_hlai_quizgen_debug.log';
 
+    /** @var int Log file size in bytes above which it is rotated */
+    const MAX_LOG_SIZE = 10 * 1024 * 1024;
+
     /** @var bool Whether logging is enabled */
     private static $enabled = null;
 
@@ -339,8 +342,11 @@ class debug_logger {
      */
     private static function writetofile(string $entry): void {
         if (self::$logfile) {
+            // Other cron, adhoc and web processes append to the same file, so stat it fresh each time.
+            clearstatcache(true, self::$logfile);
+
             // Rotate log if too large (> 10MB).
-            if (file_exists(self::$logfile) && filesize(self::$logfile) > 10 * 1024 * 1024) {
+            if (file_exists(self::$logfile) && filesize(self::$logfile) > self::MAX_LOG_SIZE) {
                 $rotated = self::$logfile . '.' . date('Y-m-d-His') . '.old';
                 @rename(self::$logfile, $rotated);
             }
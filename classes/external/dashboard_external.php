@@ -640,7 +640,7 @@ class dashboard_external extends external_api {
         }
 
         return [
-            'data' => json_encode($data),
+            'data' => json_encode($data, JSON_UNESCAPED_UNICODE | JSON_UNESCAPED_SLASHES),
         ];
     }
 
@@ -173,10 +173,11 @@ class wizard_external extends external_api {
             'error' => $request->status === 'failed' ? ($request->error_message ?? '') : '',
             // WARNING: current_topic, topics, and activities are returned as JSON-encoded strings
             // because their nested structures cannot be fully described by Moodle's external_value.
-            // The caller must JSON.parse() these fields.
-            'current_topic' => json_encode($currenttopic),
-            'topics' => json_encode($topicsarray),
-            'activities' => json_encode($activities),
+            // The caller must JSON.parse() these fields. This is polled while generation runs,
+            // so keep non-ASCII topic titles and URLs unescaped.
+            'current_topic' => json_encode($currenttopic, JSON_UNESCAPED_UNICODE | JSON_UNESCAPED_SLASHES),
+            'topics' => json_encode($topicsarray, JSON_UNESCAPED_UNICODE | JSON_UNESCAPED_SLASHES),
+            'activities' => json_encode($activities, JSON_UNESCAPED_UNICODE | JSON_UNESCAPED_SLASHES),
         ];
     }
 
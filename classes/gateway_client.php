@@ -34,6 +34,74 @@ class gateway_client {
     /** @var string Hardcoded gateway endpoint. */
     private const GATEWAY_URL = 'https://ai.human-logic.com/ai';
 
+    /** @var array Endpoint path for each operation; all quiz generation operations use their own endpoints. */
+    private const OPERATION_ENDPOINTS = [
+        'analyze_topics' => '/analyze_topics',
+        'generate_questions' => '/generate_questions',
+        'refine_question' => '/refine_question',
+        'generate_distractors' => '/generate_distractors',
+    ];
+
+    /** @var int Characters of 'content' the gateway uses for topic analysis; the rest is discarded server-side. */
+    private const ANALYSIS_CONTENT_LIMIT = 150000;
+
+    /** @var int Characters of 'topic_content' the gateway uses per question batch. */
+    private const QUESTION_CONTENT_LIMIT = 5000;
+
+    /** @var array Regex => replacement rules that drop redundant whitespace from source content. */
+    private const CONTENT_COMPACTION_RULES = [
+        // Runs of spaces and tabs, and blanks around line breaks.
+        '/[ \t]+/' => ' ',
+        '/ ?(\r\n|\r|\n) ?/' => "\n",
+        // More than one blank line.
+        '/\n{3,}/' => "\n\n",
+    ];
+
+    /** @var int Default maximum number of gateway requests in flight at once. */
+    private const MAX_PARALLEL_REQUESTS = 4;
+
+    /** @var int How many times a throttled or failed parallel request is sent again. */
+    private const PARALLEL_MAX_RETRIES = 2;
+
+    /** @var int Seconds to wait before the first parallel retry; doubled on each further retry. */
+    private const PARALLEL_RETRY_DELAY = 1;
+
+    /** @var int Consecutive failed gateway calls after which further calls are refused for a while. */
+    private const CIRCUIT_FAILURE_THRESHOLD = 5;
+
+    /** @var int Seconds gateway calls are refused once the failure threshold is reached. */
+    private const CIRCUIT_RESET_SECONDS = 30;
+
+    /** @var int Seconds allowed to establish a connection to the gateway. */
+    private const CONNECT_TIMEOUT = 10;
+
+    /** @var int Total time limit in seconds for each concurrently dispatched request. */
+    private const PARALLEL_REQUEST_TIMEOUT = 300;
+
+    /** @var string Gateway errors reporting that the content itself was refused by the AI provider's policy. */
+    private const CONTENT_FILTER_ERROR_PATTERN = '/content_filter|ResponsibleAIPolicyViolation/i';
+
+    /** @var int Maximum characters of a gateway error body kept in logs and messages. */
+    private const ERROR_TEXT_LIMIT = 512;
+
+    /** @var string|null Gateway key resolved once per process. */
+    private static $gatewaykey = null;
+
+    /** @var array|null Request headers shared by every gateway call, with the 'key' they were built for. */
+    private static $baseheaders = null;
+
+    /** @var int|null Parallel request limit resolved once per process. */
+    private static $maxparallel = null;
+
+    /** @var int Consecutive gateway failures in this process. */
+    private static $consecutivefailures = 0;
+
+    /** @var int Unix time until which gateway calls are refused after repeated failures. */
+    private static $circuitopenuntil = 0;
+
+    /** @var resource|\CurlShareHandle|false|null Shared DNS, TLS session and connection cache. */
+    private static $sharehandle = null;
+
     /**
      * Return the gateway base URL.
      *
@@ -49,7 +117,60 @@ class gateway_client {
      * @return string
      */
     public static function get_gateway_key(): string {
-        return trim((string)get_config('local_hlai_quizgen', 'gatewaykey'));
+        if (self::$gatewaykey === null) {
+            self::$gatewaykey = trim((string)get_config('local_hlai_quizgen', 'gatewaykey'));
+        }
+        return self::$gatewaykey;
+    }
+
+    /**
+     * Forget values memoized from plugin config.
+     *
+     * Called when the gateway settings are saved and at the start of each generation task,
+     * so long-running cron and adhoc runners pick up changed settings.
+     *
+     * @return void
+     */
+    public static function reset_caches(): void {
+        self::$gatewaykey = null;
+        self::$maxparallel = null;
+    }
+
+    /**
+     * Return the headers sent with every gateway request, including authorization.
+     *
+     * They are rebuilt whenever the gateway key differs from the one they were built
+     * for, so clearing the key memo is enough to refresh them.
+     *
+     * @return string[]
+     */
+    private static function get_base_headers(): array {
+        $key = self::get_gateway_key();
+        if (self::$baseheaders === null || self::$baseheaders['key'] !== $key) {
+            self::$baseheaders = [
+                'key' => $key,
+                'headers' => [
+                    'Content-Type: application/json',
+                    'Accept: application/json',
+                    'Authorization: Bearer ' . $key,
+                    'X-HL-Plugin: local_hlai_quizgen',
+                ],
+            ];
+        }
+        return self::$baseheaders['headers'];
+    }
+
+    /**
+     * Return how many gateway requests may be in flight at once.
+     *
+     * @return int
+     */
+    private static function get_max_parallel_requests(): int {
+        if (self::$maxparallel === null) {
+            $configured = (int)get_config('local_hlai_quizgen', 'gateway_max_parallel');
+            self::$maxparallel = $configured > 0 ? min($configured, 16) : self::MAX_PARALLEL_REQUESTS;
+        }
+        return self::$maxparallel;
     }
 
     /**
@@ -67,7 +188,7 @@ class gateway_client {
      * @param array $payload Request payload
      * @param string $quality Quality mode (fast|balanced|best)
      * @return array Response with 'topics' array
-     * @throws \moodle_exception
+     * @throws gateway_exception
      */
     public static function analyze_topics(array $payload, string $quality = 'balanced'): array {
         return self::call_gateway('analyze_topics', $payload, $quality);
@@ -79,7 +200,7 @@ class gateway_client {
      * @param array $payload Request payload
      * @param string $quality Quality mode (fast|balanced|best)
      * @return array Response with 'questions' array and 'tokens' object
-     * @throws \moodle_exception
+     * @throws gateway_exception
      */
     public static function generate_questions(array $payload, string $quality = 'balanced'): array {
         return self::call_gateway('generate_questions', $payload, $quality);
@@ -91,7 +212,7 @@ class gateway_client {
      * @param array $payload Request payload
      * @param string $quality Quality mode (fast|balanced|best)
      * @return array Response with refined 'question' object
-     * @throws \moodle_exception
+     * @throws gateway_exception
      */
     public static function refine_question(array $payload, string $quality = 'balanced'): array {
         return self::call_gateway('refine_question', $payload, $quality);
@@ -103,12 +224,28 @@ class gateway_client {
      * @param array $payload Request payload
      * @param string $quality Quality mode (fast|balanced|best)
      * @return array Response with 'distractors' array
-     * @throws \moodle_exception
+     * @throws gateway_exception
      */
     public static function generate_distractors(array $payload, string $quality = 'balanced'): array {
         return self::call_gateway('generate_distractors', $payload, $quality);
     }
 
+    /**
+     * Send several question generation requests to the gateway concurrently.
+     *
+     * Requests are dispatched in groups of gateway_max_parallel so a topic with
+     * many batches waits roughly one round-trip per group instead of one per batch.
+     * Failed requests are logged and left out of the result; callers should retry
+     * them through generate_questions().
+     *
+     * @param array $payloads Request payloads keyed by caller-defined index
+     * @param string $quality Quality mode (fast|balanced|best)
+     * @return array Responses keyed by the index of the payload that produced them
+     */
+    public static function generate_questions_parallel(array $payloads, string $quality = 'balanced'): array {
+        return self::call_gateway_parallel('generate_questions', $payloads, $quality);
+    }
+
     /**
      * Internal method to call the gateway API.
      *
@@ -116,21 +253,363 @@ class gateway_client {
      * @param array $payload Request payload
      * @param string $quality Quality mode
      * @return array Response content
-     * @throws \moodle_exception
+     * @throws gateway_exception
      */
     private static function call_gateway(string $operation, array $payload, string $quality): array {
+        $cachekey = self::get_response_cache_key($operation, $payload, $quality);
+        if ($cachekey === null) {
+            return self::send_request($operation, $payload, $quality);
+        }
+
+        $cached = cache_manager::get_cached_response('questions', $cachekey);
+        if (is_array($cached)) {
+            return $cached;
+        }
+
+        // Identical requests already in flight elsewhere fill the cache; wait for them rather than repeat the call.
+        $lock = cache_manager::get_fill_lock('questions', $cachekey);
+        try {
+            if ($lock) {
+                $cached = cache_manager::get_cached_response('questions', $cachekey);
+                if (is_array($cached)) {
+                    return $cached;
+                }
+            }
+
+            $content = self::send_request($operation, $payload, $quality, $httpcode);
+            self::cache_response($operation, $cachekey, $httpcode, $content);
+            return $content;
+        } finally {
+            if ($lock) {
+                $lock->release();
+            }
+        }
+    }
+
+    /**
+     * Send one request to the gateway and decode its response.
+     *
+     * @param string $operation Operation name
+     * @param array $payload Request payload
+     * @param string $quality Quality mode
+     * @param int|null $httpcode Set to the HTTP status of the reply, or 0 if none was received
+     * @return array Response content
+     * @throws gateway_exception
+     */
+    private static function send_request(string $operation, array $payload, string $quality, ?int &$httpcode = null): array {
+        $httpcode = 0;
+        self::require_circuit_closed();
+        $request = self::build_request($operation, $payload, $quality);
+
+        // Create curl with ignoresecurity flag to allow localhost connections.
+        // This is required because Moodle's security helper blocks localhost by default.
+        $curl = new \curl(['ignoresecurity' => true]);
+        $curl->setopt(self::get_transport_options());
+
+        try {
+            $curl->setHeader($request['headers']);
+            $response = $curl->post($request['url'], $request['body']);
+        } catch (\Throwable $e) {
+            self::record_gateway_outcome(0);
+            debug_logger::error('Gateway request failed', [
+                'operation' => $operation,
+                'error' => $e->getMessage(),
+            ]);
+            throw new gateway_exception('Gateway request failed: ' . $e->getMessage());
+        }
+
+        $httpcode = (int)($curl->get_info()['http_code'] ?? 0);
+        self::record_gateway_outcome($httpcode);
+        return self::decode_response($operation, (string)$response, $httpcode);
+    }
+
+    /**
+     * Whether gateway calls are currently refused after repeated failures.
+     *
+     * @return bool
+     */
+    private static function is_circuit_open(): bool {
+        return self::$circuitopenuntil > time();
+    }
+
+    /**
+     * Throw instead of calling a gateway that has just failed repeatedly.
+     *
+     * The exception is not retryable: retrying inside the open window would only be
+     * refused again, so callers give up on the batch instead of backing off.
+     *
+     * @return void
+     * @throws gateway_exception
+     */
+    private static function require_circuit_closed(): void {
+        if (self::is_circuit_open()) {
+            throw new gateway_exception(
+                'Gateway circuit open after ' . self::CIRCUIT_FAILURE_THRESHOLD . ' consecutive failures; retry in ' .
+                    (self::$circuitopenuntil - time()) . ' seconds',
+                false
+            );
+        }
+    }
+
+    /**
+     * Track gateway health from the HTTP status of a finished call.
+     *
+     * Transport failures (status 0) and server errors (5xx) count towards the threshold;
+     * any other response means the gateway is up and resets the count.
+     *
+     * @param int $httpcode HTTP status, or 0 if no response was received
+     * @return void
+     */
+    private static function record_gateway_outcome(int $httpcode): void {
+        if ($httpcode !== 0 && $httpcode < 500) {
+            self::$consecutivefailures = 0;
+            return;
+        }
+
+        self::$consecutivefailures++;
+        if (self::$consecutivefailures >= self::CIRCUIT_FAILURE_THRESHOLD) {
+            self::$circuitopenuntil = time() + self::CIRCUIT_RESET_SECONDS;
+            self::$consecutivefailures = 0;
+            debug_logger::error('Gateway circuit opened after repeated failures', [
+                'threshold' => self::CIRCUIT_FAILURE_THRESHOLD,
+                'reset_seconds' => self::CIRCUIT_RESET_SECONDS,
+            ]);
+        }
+    }
+
+    /**
+     * Cache key for an exact-match response cache, or null when the call must not be cached.
+     *
+     * Only fast-quality question generation is cached: it is the low-temperature mode where an
+     * identical payload is expected to give an equivalent answer, and regeneration requests
+     * explicitly ask for a different question.
+     *
+     * @param string $operation Operation name
+     * @param array $payload Request payload
+     * @param string $quality Quality mode
+     * @return string|null Cache key
+     */
+    private static function get_response_cache_key(string $operation, array $payload, string $quality): ?string {
+        if ($operation !== 'generate_questions' || $quality !== 'fast' || !empty($payload['is_regeneration'])) {
+            return null;
+        }
+        if (!cache_manager::is_caching_enabled()) {
+            return null;
+        }
+        return cache_manager::generate_gateway_cache_key($operation, $quality, $payload);
+    }
+
+    /**
+     * Store a gateway response in the exact-match cache if it is worth reusing.
+     *
+     * Only successful replies that contain questions are kept: anything else would be
+     * served back for the same payload for the whole cache lifetime.
+     *
+     * @param string $operation Operation name
+     * @param string $cachekey Key from get_response_cache_key()
+     * @param int $httpcode HTTP status of the reply
+     * @param array $content Decoded response content
+     * @return void
+     */
+    private static function cache_response(string $operation, string $cachekey, int $httpcode, array $content): void {
+        if ($httpcode < 200 || $httpcode >= 300 || empty($content['questions'])) {
+            return;
+        }
+        cache_manager::set_cached_response('questions', $cachekey, $content, ['operation' => $operation]);
+    }
+
+    /**
+     * Call the gateway for several payloads of the same operation concurrently.
+     *
+     * Requests the gateway throttles (HTTP 429) or fails to serve (5xx) are sent again
+     * with exponential backoff, up to PARALLEL_MAX_RETRIES times.
+     * Each request counts once towards the circuit breaker, with the outcome of its last
+     * attempt, and retries stop as soon as the circuit opens.
+     *
+     * This is only a fast path: it drives curl directly, so it is skipped whenever the
+     * site routes outbound traffic through a proxy or the security helper blocks the
+     * gateway host. Redirects are not followed either, and a request that fails in curl
+     * itself (connect, TLS, timeout) is dropped without counting against the gateway.
+     * Payloads missing from the result are sent by the caller through the \curl wrapper,
+     * which handles all of those cases.
+     *
+     * @param string $operation Operation name
+     * @param array $payloads Request payloads keyed by caller-defined index
+     * @param string $quality Quality mode
+     * @return array Response content keyed by payload index (failures omitted)
+     */
+    private static function call_gateway_parallel(string $operation, array $payloads, string $quality): array {
+        global $CFG;
+
+        $results = [];
+        if (!function_exists('curl_multi_init') || self::is_circuit_open()) {
+            return $results;
+        }
+        if (!empty($CFG->proxyhost) || (new \core\files\curl_security_helper())->url_is_blocked(self::get_gateway_url())) {
+            return $results;
+        }
+
+        $requests = [];
+        $cachekeys = [];
+        foreach ($payloads as $index => $payload) {
+            $cachekey = self::get_response_cache_key($operation, $payload, $quality);
+            if ($cachekey !== null) {
+                $cached = cache_manager::get_cached_response('questions', $cachekey);
+                if (is_array($cached)) {
+                    $results[$index] = $cached;
+                    continue;
+                }
+                $cachekeys[$index] = $cachekey;
+            }
+
+            try {
+                $requests[$index] = self::build_request($operation, $payload, $quality);
+            } catch (gateway_exception $e) {
+                continue;
+            }
+        }
+
+        $lastcodes = [];
+        for ($attempt = 0; !empty($requests) && $attempt <= self::PARALLEL_MAX_RETRIES; $attempt++) {
+            if ($attempt > 0) {
+                sleep(self::PARALLEL_RETRY_DELAY * (2 ** ($attempt - 1)));
+                if (self::is_circuit_open()) {
+                    break;
+                }
+            }
+
+            $retry = [];
+            foreach (array_chunk($requests, self::get_max_parallel_requests(), true) as $group) {
+                foreach (self::dispatch_parallel_group($group) as $index => $reply) {
+                    if ($reply['error'] !== '') {
+                        // A transport failure here may be specific to this path; the \curl fallback decides.
+                        debug_logger::debug('Concurrent gateway request failed, leaving it to the serial path', [
+                            'operation' => $operation,
+                            'error' => $reply['error'],
+                            'attempt' => $attempt,
+                        ]);
+                        continue;
+                    }
+
+                    $httpcode = $reply['httpcode'];
+                    if ($httpcode === 429 || $httpcode >= 500) {
+                        debug_logger::error('Gateway request failed', [
+                            'operation' => $operation,
+                            'http_code' => $httpcode,
+                            'attempt' => $attempt,
+                        ]);
+                        $retry[$index] = $group[$index];
+                        $lastcodes[$index] = $httpcode;
+                        continue;
+                    }
+
+                    self::record_gateway_outcome($httpcode);
+
+                    try {
+                        $results[$index] = self::decode_response($operation, $reply['body'], $reply['httpcode']);
+                        if (isset($cachekeys[$index])) {
+                            self::cache_response($operation, $cachekeys[$index], $httpcode, $results[$index]);
+                        }
+                    } catch (gateway_exception $e) {
+                        // Already logged by decode_response(); the caller retries this item.
+                        continue;
+                    }
+                }
+            }
+            $requests = $retry;
+        }
+
+        // Requests still failing when retries ran out or the circuit opened end here.
+        foreach (array_keys($requests) as $index) {
+            self::record_gateway_outcome($lastcodes[$index]);
+        }
+
+        return $results;
+    }
+
+    /**
+     * Send a group of prepared requests at once and wait for all of them to finish.
+     *
+     * @param array $requests Requests from build_request(), keyed by payload index
+     * @return array Per-index arrays with 'body', 'httpcode', 'error' and 'errno' keys
+     */
+    private static function dispatch_parallel_group(array $requests): array {
+        $multi = curl_multi_init();
+        if (defined('CURLMOPT_PIPELINING') && defined('CURLPIPE_MULTIPLEX')) {
+            // Let concurrent requests share one HTTP/2 connection to the gateway.
+            curl_multi_setopt($multi, CURLMOPT_PIPELINING, CURLPIPE_MULTIPLEX);
+        }
+        $handles = [];
+        foreach ($requests as $index => $request) {
+            $ch = curl_init($request['url']);
+            curl_setopt_array($ch, [
+                CURLOPT_POST => true,
+                CURLOPT_POSTFIELDS => $request['body'],
+                CURLOPT_HTTPHEADER => $request['headers'],
+                CURLOPT_RETURNTRANSFER => true,
+                CURLOPT_TIMEOUT => self::PARALLEL_REQUEST_TIMEOUT,
+                CURLOPT_USERAGENT => \core_useragent::get_moodlebot_useragent(),
+                // A redirect comes back as an error here and the caller resends it through \curl.
+                CURLOPT_FOLLOWLOCATION => false,
+            ]);
+            // Trust the same CA bundle as \curl (bundled on Windows, or moodledata/moodleorgca.crt).
+            $cacert = \curl::get_cacert();
+            if (!empty($cacert)) {
+                curl_setopt($ch, CURLOPT_CAINFO, $cacert);
+            }
+            foreach (self::get_transport_options() as $name => $value) {
+                curl_setopt($ch, constant($name), $value);
+            }
+
+            curl_multi_add_handle($multi, $ch);
+            $handles[$index] = $ch;
+        }
+
+        do {
+            $status = curl_multi_exec($multi, $running);
+            if ($running) {
+                curl_multi_select($multi);
+            }
+        } while ($running && $status === CURLM_OK);
+
+        $replies = [];
+        foreach ($handles as $index => $ch) {
+            $replies[$index] = [
+                'body' => (string)curl_multi_getcontent($ch),
+                'httpcode' => (int)curl_getinfo($ch, CURLINFO_HTTP_CODE),
+                'error' => curl_error($ch),
+                'errno' => curl_errno($ch),
+            ];
+            curl_multi_remove_handle($multi, $ch);
+            curl_close($ch);
+        }
+        curl_multi_close($multi);
+
+        return $replies;
+    }
+
+    /**
+     * Build the URL, headers and JSON body for a gateway request.
+     *
+     * @param string $operation Operation name
+     * @param array $payload Request payload
+     * @param string $quality Quality mode
+     * @return array Array with 'url', 'headers' and 'body' keys
+     * @throws gateway_exception
+     */
+    private static function build_request(string $operation, array $payload, string $quality): array {
         global $CFG;
 
         if (!self::is_ready()) {
-            throw new \moodle_exception(
-                'error:noaiprovider',
-                'local_hlai_quizgen',
-                '',
-                null,
-                'Gateway not configured. Please configure the AI Service URL and API Key in plugin settings.'
+            throw new gateway_exception(
+                'Gateway not configured. Please configure the AI Service URL and API Key in plugin settings.',
+                false
             );
         }
 
+        // The gateway only reads the first N characters of the source content; don't ship the rest.
+        $payload = self::truncate_payload_content($payload);
+
         // Sanitize payload strings to remove malformed UTF-8 (from PDF/SCORM extraction).
         $payload = self::clean_payload_utf8($payload);
 
@@ -146,86 +625,79 @@ class gateway_client {
         // Determine endpoint based on operation.
         $endpoint = self::get_endpoint_for_operation($operation);
         $url = rtrim(self::get_gateway_url(), '/') . $endpoint;
-        $key = self::get_gateway_key();
+        $headers = self::get_base_headers();
 
-        // Create curl with ignoresecurity flag to allow localhost connections.
-        // This is required because Moodle's security helper blocks localhost by default.
-        $curl = new \curl(['ignoresecurity' => true]);
-        $headers = [
-            'Content-Type: application/json',
-            'Accept: application/json',
-            'Authorization: Bearer ' . $key,
-            'X-HL-Plugin: local_hlai_quizgen',
-        ];
+        // Encode once; unescaped UTF-8 and slashes keep large content payloads compact.
+        $jsonbody = json_encode($request, JSON_UNESCAPED_UNICODE | JSON_UNESCAPED_SLASHES);
+        if ($jsonbody === false) {
+            $jsonerror = json_last_error_msg();
+            debugging("HLAI gateway json_encode FAILED: {$jsonerror} | operation={$operation}" .
+                " | topic_title=" . ($payload['topic_title'] ?? 'N/A'), DEBUG_DEVELOPER);
+            throw new gateway_exception('Failed to encode request as JSON: ' . $jsonerror);
+        }
 
         debug_logger::debug("Gateway API Call", [
             'operation' => $operation,
             'url' => $url,
             'quality' => $quality,
-            'payload_size' => strlen(json_encode($payload)),
+            'payload_size' => strlen($jsonbody),
         ]);
 
-        $jsonbody = json_encode($request);
-        if ($jsonbody === false) {
-            $jsonerror = json_last_error_msg();
-            debugging("HLAI gateway json_encode FAILED: {$jsonerror} | operation={$operation}" .
-                " | topic_title=" . ($payload['topic_title'] ?? 'N/A'), DEBUG_DEVELOPER);
-            throw new \moodle_exception(
-                'error:noaiprovider',
-                'local_hlai_quizgen',
-                '',
-                null,
-                'Failed to encode request as JSON: ' . $jsonerror
-            );
-        }
-
         debugging("HLAI gateway sending: operation={$operation}, json_len=" . strlen($jsonbody) .
             ", topic_title=" . ($payload['topic_title'] ?? 'N/A'), DEBUG_DEVELOPER);
 
-        try {
-            $curl->setHeader($headers);
-            $response = $curl->post($url, $jsonbody);
-        } catch (\Throwable $e) {
-            debug_logger::error('Gateway request failed', [
-                'operation' => $operation,
-                'error' => $e->getMessage(),
-            ]);
-            throw new \moodle_exception(
-                'error:noaiprovider',
-                'local_hlai_quizgen',
-                '',
-                null,
-                'Gateway request failed: ' . $e->getMessage()
-            );
-        }
+        return [
+            'url' => $url,
+            'headers' => $headers,
+            'body' => $jsonbody,
+        ];
+    }
+
+    /**
+     * Decode a raw gateway response and return its content.
+     *
+     * The body is the gateway's own JSON envelope, so it is decoded strictly, and only a
+     * 2xx reply counts as success. A proxy or firewall error page is never mistaken for one.
+     *
+     * @param string $operation Operation name
+     * @param string $response Raw response body
+     * @param int $httpcode HTTP status of the response
+     * @return array Response content
+     * @throws gateway_exception
+     */
+    private static function decode_response(string $operation, string $response, int $httpcode): array {
+        $status = " (HTTP {$httpcode})";
 
-        $decoded = json_decode((string)$response, true);
+        $decoded = json_decode($response, true);
         if (!is_array($decoded)) {
             debug_logger::error('Gateway response not valid JSON', [
                 'operation' => $operation,
-                'response' => substr($response, 0, 500),
+                'http_code' => $httpcode,
+                'response' => substr($response, 0, self::ERROR_TEXT_LIMIT),
             ]);
-            throw new \moodle_exception(
-                'error:noaiprovider',
-                'local_hlai_quizgen',
-                '',
-                null,
-                'Gateway response was not valid JSON'
-            );
+            throw new gateway_exception('Gateway response was not valid JSON' . $status);
         }
 
         if (!empty($decoded['error'])) {
+            $error = is_string($decoded['error']) ? $decoded['error'] : json_encode($decoded['error']);
+            $error = \core_text::substr((string)$error, 0, self::ERROR_TEXT_LIMIT);
             debug_logger::error('Gateway rejected request', [
                 'operation' => $operation,
-                'error' => $decoded['error'],
+                'http_code' => $httpcode,
+                'error' => $error,
             ]);
-            throw new \moodle_exception(
-                'error:noaiprovider',
-                'local_hlai_quizgen',
-                '',
-                null,
-                'Gateway error: ' . $decoded['error']
-            );
+            // A content policy rejection will be repeated for the same content.
+            $retryable = !preg_match(self::CONTENT_FILTER_ERROR_PATTERN, $error);
+            throw new gateway_exception('Gateway error' . $status . ': ' . $error, $retryable);
+        }
+
+        if ($httpcode < 200 || $httpcode >= 300) {
+            debug_logger::error('Gateway returned an unexpected status', [
+                'operation' => $operation,
+                'http_code' => $httpcode,
+                'response' => substr($response, 0, self::ERROR_TEXT_LIMIT),
+            ]);
+            throw new gateway_exception('Gateway returned an unexpected status' . $status);
         }
 
         debug_logger::info('Gateway API Success', [
@@ -237,6 +709,62 @@ class gateway_client {
         return $decoded['content'] ?? $decoded;
     }
 
+    /**
+     * Return the curl share handle used by all gateway requests in this process.
+     *
+     * Every batch otherwise pays a fresh DNS lookup, TCP connect and TLS handshake,
+     * because each \curl instance creates and closes its own handle.
+     *
+     * @return resource|\CurlShareHandle|false Share handle, or false if unavailable
+     */
+    private static function get_share_handle() {
+        if (self::$sharehandle === null) {
+            self::$sharehandle = false;
+            if (function_exists('curl_share_init')) {
+                $handle = curl_share_init();
+                curl_share_setopt($handle, CURLSHOPT_SHARE, CURL_LOCK_DATA_DNS);
+                curl_share_setopt($handle, CURLSHOPT_SHARE, CURL_LOCK_DATA_SSL_SESSION);
+                if (defined('CURL_LOCK_DATA_CONNECT')) {
+                    curl_share_setopt($handle, CURLSHOPT_SHARE, CURL_LOCK_DATA_CONNECT);
+                }
+                self::$sharehandle = $handle;
+            }
+        }
+        return self::$sharehandle;
+    }
+
+    /**
+     * Connection options applied to every gateway request, keyed by CURLOPT_* name.
+     *
+     * Both the serial \curl path and the concurrent path take all their connection
+     * settings from here, so they share one DNS, TLS and connection cache.
+     *
+     * Names rather than constant values are used because Moodle's \curl wrapper only
+     * accepts string option names; the raw curl_multi path resolves them with constant().
+     *
+     * @return array
+     */
+    private static function get_transport_options(): array {
+        $options = [
+            // Fail fast on an unreachable gateway instead of waiting out the full request timeout.
+            'CURLOPT_CONNECTTIMEOUT' => self::CONNECT_TIMEOUT,
+            // Let the gateway compress large JSON responses; curl decodes them transparently.
+            'CURLOPT_ENCODING' => '',
+            // Keep idle pooled connections alive between batches.
+            'CURLOPT_TCP_KEEPALIVE' => 1,
+        ];
+        $sharehandle = self::get_share_handle();
+        if ($sharehandle) {
+            // Reuse DNS lookups, TLS sessions and open connections from earlier calls in this process.
+            $options['CURLOPT_SHARE'] = $sharehandle;
+        }
+        if (defined('CURL_HTTP_VERSION_2TLS')) {
+            // Negotiate HTTP/2 over TLS where available, falling back to HTTP/1.1.
+            $options['CURLOPT_HTTP_VERSION'] = CURL_HTTP_VERSION_2TLS;
+        }
+        return $options;
+    }
+
     /**
      * Get the endpoint path for a given operation.
      *
@@ -244,19 +772,46 @@ class gateway_client {
      * @return string Endpoint path
      */
     private static function get_endpoint_for_operation(string $operation): string {
-        // All quiz generation operations use their own endpoints.
-        switch ($operation) {
-            case 'analyze_topics':
-                return '/analyze_topics';
-            case 'generate_questions':
-                return '/generate_questions';
-            case 'refine_question':
-                return '/refine_question';
-            case 'generate_distractors':
-                return '/generate_distractors';
-            default:
-                return '/generate'; // Fallback generic endpoint.
+        return self::OPERATION_ENDPOINTS[$operation] ?? '/generate'; // Fallback generic endpoint.
+    }
+
+    /**
+     * Cap the source content fields of a payload at the length the gateway actually reads.
+     *
+     * The full course text can run to megabytes and was otherwise serialised, sent and
+     * cleaned for every batch only to be cut down on the gateway. Redundant whitespace is
+     * collapsed first so the limit is spent on course text; only a prefix of twice the
+     * limit is compacted, so the regexes never run over the whole source.
+     *
+     * @param array $payload Request payload
+     * @return array Payload with 'content' and 'topic_content' compacted and capped
+     */
+    private static function truncate_payload_content(array $payload): array {
+        $limits = [
+            'content' => self::ANALYSIS_CONTENT_LIMIT,
+            'topic_content' => self::QUESTION_CONTENT_LIMIT,
+        ];
+        foreach ($limits as $field => $limit) {
+            if (!isset($payload[$field]) || !is_string($payload[$field])) {
+                continue;
+            }
+            // Byte length is an upper bound on character length, so short values skip mb_substr.
+            if (strlen($payload[$field]) > 2 * $limit) {
+                $payload[$field] = mb_substr($payload[$field], 0, 2 * $limit, 'UTF-8');
+            }
+            $compacted = preg_replace(
+                array_keys(self::CONTENT_COMPACTION_RULES),
+                array_values(self::CONTENT_COMPACTION_RULES),
+                $payload[$field]
+            );
+            if (is_string($compacted)) {
+                $payload[$field] = trim($compacted);
+            }
+            if (strlen($payload[$field]) > $limit) {
+                $payload[$field] = mb_substr($payload[$field], 0, $limit, 'UTF-8');
+            }
         }
+        return $payload;
     }
 
     /**
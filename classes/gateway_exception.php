@@ -0,0 +1,47 @@
+<?php
+// This file is part of Moodle - http://moodle.org/
+//
+// Moodle is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+//
+// Moodle is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with Moodle.  If not, see <https://www.gnu.org/licenses/>.
+
+/**
+ * Exception for failed gateway calls.
+ *
+ * @package    local_hlai_quizgen
+ * @copyright  2025 Human Logic Software LLC
+ * @license    http://www.gnu.org/copyleft/gpl.html GNU GPL v3 or later
+ */
+
+namespace local_hlai_quizgen;
+
+/**
+ * Raised when the AI gateway cannot be called or rejects a request.
+ *
+ * Callers decide whether to retry from $retryable rather than from the message,
+ * which only includes the failure detail when developer debugging is on.
+ */
+class gateway_exception extends \moodle_exception {
+    /** @var bool Whether sending the same request again may succeed. */
+    public $retryable;
+
+    /**
+     * Constructor.
+     *
+     * @param string $debuginfo Failure detail for logs and developers
+     * @param bool $retryable Whether sending the same request again may succeed
+     */
+    public function __construct(string $debuginfo, bool $retryable = true) {
+        $this->retryable = $retryable;
+        parent::__construct('error:noaiprovider', 'local_hlai_quizgen', '', null, $debuginfo);
+    }
+}
@@ -45,49 +45,27 @@ class question_generator {
     /** @var array Bloom's taxonomy levels */
     const BLOOMS_LEVELS = ['remember', 'understand', 'apply', 'analyze', 'evaluate', 'create'];
 
-    /**
-     * Select difficulty based on distribution percentages.
-     *
-     * @param array $distribution Distribution array ['easy' => 20, 'medium' => 60, 'hard' => 20]
-     * @return string Selected difficulty level
-     */
-    private static function select_difficulty_from_distribution(array $distribution): string {
-        $rand = rand(1, 100);
-        $cumulative = 0;
-
-        foreach ($distribution as $level => $percentage) {
-            $cumulative += $percentage;
-            if ($rand <= $cumulative) {
-                return $level;
-            }
-        }
+    /** @var int Most recent questions of a request sent to the gateway to avoid duplicates. */
+    const EXISTING_QUESTIONS_LIMIT = 10;
 
-        return 'medium'; // Fallback.
-    }
+    /** @var array Static cache for content to avoid repeated fetching. */
+    private static $contentcache = [];
+
+    /** @var bool|null Whether question validation is enabled, read once per process. */
+    private static $validationenabled = null;
 
     /**
-     * Select Bloom's level based on distribution percentages.
+     * Forget values memoized from plugin config and extracted request content.
      *
-     * @param array $distribution Distribution array ['remember' => 20, 'understand' => 25, ...]
-     * @return string Selected Bloom's level
+     * Called when the validation setting is saved and at the start of each generation task.
+     *
+     * @return void
      */
-    private static function select_blooms_from_distribution(array $distribution): string {
-        $rand = rand(1, 100);
-        $cumulative = 0;
-
-        foreach ($distribution as $level => $percentage) {
-            $cumulative += $percentage;
-            if ($rand <= $cumulative) {
-                return $level;
-            }
-        }
-
-        return 'understand'; // Fallback.
+    public static function reset_caches(): void {
+        self::$validationenabled = null;
+        self::$contentcache = [];
     }
 
-    /** @var array Static cache for content to avoid repeated fetching. */
-    private static $contentcache = [];
-
     /**
      * Generate questions for a topic.
      *
@@ -99,6 +77,7 @@ class question_generator {
      *        - 'num_questions' => number to generate
      *        - 'processing_mode' => 'fast|balanced|best'
      *        - 'custom_instructions' => optional custom instructions
+     *        - 'progress_callback' => optional callable(int $saved, int $requested), called after each batch
      * @return array Array of generated question objects
      * @throws \moodle_exception If generation fails
      */
@@ -166,11 +145,12 @@ class question_generator {
         $batchsize = min(10, $numquestions); // Generate up to 10 questions per API call.
         $batches = ceil($numquestions / $batchsize);
 
+        // Determine types for every batch using LOCAL index into topic's type slice.
+        $allbatchtypes = [];
         for ($batch = 0; $batch < $batches; $batch++) {
             $batchstart = $batch * $batchsize;
             $batchcount = min($batchsize, $numquestions - $batchstart);
 
-            // Determine types for this batch using LOCAL index into topic's type slice.
             $batchtypes = [];
             for ($i = 0; $i < $batchcount; $i++) {
                 $localindex = $batchstart + $i;
@@ -183,6 +163,27 @@ class question_generator {
                     $batchtypes[] = $questiontypes[$localindex % count($questiontypes)];
                 }
             }
+            $allbatchtypes[$batch] = $batchtypes;
+        }
+
+        // With several batches, request them from the gateway concurrently.
+        // Batches that fail here are generated again one at a time below.
+        $prefetched = [];
+        if ($batches > 1) {
+            $prefetched = self::prefetch_question_batches($topic, $allbatchtypes, $config);
+        }
+
+        // Ownership fields stamped onto every generated question, built once per topic.
+        $questioncontext = [
+            'requestid' => $requestid,
+            'topicid' => $topicid,
+            'courseid' => $request->courseid,
+            'userid' => $request->userid,
+        ];
+
+        for ($batch = 0; $batch < $batches; $batch++) {
+            $batchtypes = $allbatchtypes[$batch];
+            $batchcount = count($batchtypes);
 
             // Retry up to 2 times if batch fails.
             $maxretries = 2;
@@ -190,7 +191,18 @@ class question_generator {
 
             for ($retry = 0; $retry <= $maxretries && !$batchsuccess; $retry++) {
                 try {
-                    $result = self::generate_question_batch($topic, $batchtypes, $config);
+                    $duplicatetypes = [];
+                    if ($retry === 0 && isset($prefetched[$batch])) {
+                        $result = $prefetched[$batch];
+                        // Prefetched batches never saw this topic's earlier batches, so drop repeats
+                        // of questions saved so far; the shortfall call below replaces them.
+                        [$result['questions'], $duplicatetypes] = self::drop_duplicate_questions(
+                            $result['questions'] ?? [],
+                            $questions
+                        );
+                    } else {
+                        $result = self::generate_question_batch($topic, $batchtypes, $config);
+                    }
 
                     // Accumulate tokens.
                     $totalprompt += $result['tokens']->prompt ?? 0;
@@ -202,14 +214,7 @@ class question_generator {
                         json_encode($batchtypes), DEBUG_DEVELOPER);
 
                     foreach ($result['questions'] as $qi => $questionobj) {
-                        // Ensure properties are set as object properties.
-                        if (!is_object($questionobj)) {
-                            $questionobj = (object)$questionobj;
-                        }
-                        $questionobj->requestid = $requestid;
-                        $questionobj->topicid = $topicid;
-                        $questionobj->courseid = $request->courseid;
-                        $questionobj->userid = $request->userid;
+                        $questionobj = self::apply_question_context($questionobj, $questioncontext);
 
                         try {
                             $savedquestion = self::save_question($questionobj);
@@ -222,29 +227,27 @@ class question_generator {
                         }
                     }
 
-                    // Check if AI returned fewer questions than requested.
+                    // Check if AI returned fewer questions than requested, or some were dropped as duplicates.
                     $returned = count($result['questions'] ?? []);
                     if ($returned < $batchcount) {
                         $shortfall = $batchcount - $returned;
                         debug_logger::debug("Batch returned {$returned} of {$batchcount}, retrying for {$shortfall} missing", [
                             'topic_id' => $topicid,
                             'batch' => $batch,
+                            'duplicates' => count($duplicatetypes),
                         ], $requestid);
 
                         // Build types for the missing questions.
-                        $missingtypes = array_slice($batchtypes, $returned);
+                        $missingtypes = array_merge(
+                            $duplicatetypes,
+                            array_slice($batchtypes, $returned + count($duplicatetypes))
+                        );
                         try {
                             $extraresult = self::generate_question_batch($topic, $missingtypes, $config);
                             $totalprompt += $extraresult['tokens']->prompt ?? 0;
                             $totalresponse += $extraresult['tokens']->completion ?? 0;
                             foreach ($extraresult['questions'] as $questionobj) {
-                                if (!is_object($questionobj)) {
-                                    $questionobj = (object)$questionobj;
-                                }
-                                $questionobj->requestid = $requestid;
-                                $questionobj->topicid = $topicid;
-                                $questionobj->courseid = $request->courseid;
-                                $questionobj->userid = $request->userid;
+                                $questionobj = self::apply_question_context($questionobj, $questioncontext);
                                 $savedquestion = self::save_question($questionobj);
                                 $questions[] = $savedquestion;
                             }
@@ -257,17 +260,23 @@ class question_generator {
                 } catch (\Exception $e) {
                     debugging("HLAI batch {$batch} EXCEPTION (retry {$retry}/{$maxretries}), topic_id={$topicid}: " .
                         $e->getMessage(), DEBUG_DEVELOPER);
-                    if ($retry >= $maxretries) {
+                    if ($retry >= $maxretries || !self::is_retryable_error($e)) {
                         // Final retry failed - log error and continue.
-                        debugging("HLAI batch {$batch} GAVE UP after {$maxretries} retries for topic {$topicid}. " .
+                        debugging("HLAI batch {$batch} GAVE UP after {$retry} retries for topic {$topicid}. " .
                             "Types=" . json_encode($batchtypes), DEBUG_DEVELOPER);
                         error_handler::handle_exception($e, $requestid, 'question_generator', error_handler::SEVERITY_WARNING);
+                        break;
                     } else {
                         // Wait before retry.
                         sleep(1);
                     }
                 }
             }
+
+            // Report progress as each batch lands instead of only once the whole topic is done.
+            if (isset($config['progress_callback']) && is_callable($config['progress_callback'])) {
+                call_user_func($config['progress_callback'], count($questions), (int)$numquestions);
+            }
         }
 
         // Update request token totals using DML helper.
@@ -311,19 +320,129 @@ class question_generator {
      * @throws \moodle_exception If generation fails
      */
     private static function generate_question_batch(\stdClass $topic, array $types, array $config): array {
-        global $DB;
-
         // Require gateway client.
         if (!gateway_client::is_ready()) {
-            throw new \moodle_exception(
-                'error:noaiprovider',
-                'local_hlai_quizgen',
-                '',
-                'Gateway not configured. Please configure the AI Service URL and API Key in plugin settings.'
+            throw new gateway_exception(
+                'Gateway not configured. Please configure the AI Service URL and API Key in plugin settings.',
+                false
             );
         }
 
-        $count = count($types);
+        $requestid = $config['requestid'] ?? ($topic->requestid ?? 0);
+        $payload = self::build_batch_payload($topic, $types, $config);
+
+        // Determine quality mode from config.
+        $quality = $config['processing_mode'] ?? 'balanced';
+
+        // Log gateway call parameters.
+        \local_hlai_quizgen\debug_logger::debug('About to call gateway for question generation', [
+            'topic_title' => $topic->title,
+            'payload_content_length' => strlen($payload['topic_content']),
+            'num_questions' => count($types),
+            'quality' => $quality,
+        ], $requestid);
+
+        // Call gateway for question generation.
+        $response = gateway_client::generate_questions($payload, $quality);
+
+        \local_hlai_quizgen\debug_logger::debug('Gateway response received', [
+            'questions_returned' => count($response['questions'] ?? []),
+        ], $requestid);
+
+        return self::batch_result_from_response($response);
+    }
+
+    /**
+     * Whether a failed batch is worth requesting again.
+     *
+     * Gateway failures say so explicitly; the exception message is not inspected because
+     * it only carries the failure detail when developer debugging is on.
+     *
+     * @param \Throwable $e Failure from generating or saving a batch
+     * @return bool
+     */
+    private static function is_retryable_error(\Throwable $e): bool {
+        return !($e instanceof gateway_exception) || $e->retryable;
+    }
+
+    /**
+     * Generate several batches for one topic with concurrent gateway calls.
+     *
+     * All payloads are built up front, so their existing_questions context cannot include
+     * questions from this topic's other batches. generate_for_topic() filters each batch
+     * with drop_duplicate_questions() and regenerates the dropped ones serially.
+     *
+     * @param \stdClass $topic Topic object
+     * @param array $batchtypes Question types for each batch, keyed by batch index
+     * @param array $config Configuration
+     * @return array Batch results keyed by batch index (failed batches omitted)
+     */
+    private static function prefetch_question_batches(\stdClass $topic, array $batchtypes, array $config): array {
+        if (!gateway_client::is_ready()) {
+            return [];
+        }
+
+        $payloads = [];
+        foreach ($batchtypes as $batch => $types) {
+            $payloads[$batch] = self::build_batch_payload($topic, $types, $config);
+        }
+
+        $responses = gateway_client::generate_questions_parallel($payloads, $config['processing_mode'] ?? 'balanced');
+
+        $results = [];
+        foreach ($responses as $batch => $response) {
+            $results[$batch] = self::batch_result_from_response($response);
+        }
+
+        debug_logger::debug('Prefetched question batches in parallel', [
+            'topic_id' => $topic->id ?? 0,
+            'batches' => count($batchtypes),
+            'succeeded' => count($results),
+        ], $config['requestid'] ?? null);
+
+        return $results;
+    }
+
+    /**
+     * Remove questions that repeat one already saved for the topic.
+     *
+     * @param array $batchquestions Questions returned by the gateway for one batch
+     * @param array $savedquestions Question objects saved so far
+     * @return array Kept questions, and the question types of the dropped ones
+     */
+    private static function drop_duplicate_questions(array $batchquestions, array $savedquestions): array {
+        $seen = [];
+        foreach ($savedquestions as $saved) {
+            $seen[] = (string)($saved->questiontext ?? '');
+        }
+
+        $kept = [];
+        $droppedtypes = [];
+        foreach ($batchquestions as $question) {
+            $fields = (array)$question;
+            $text = (string)($fields['questiontext'] ?? '');
+            if (question_validator::is_duplicate($text, $seen)) {
+                $droppedtypes[] = $fields['questiontype'] ?? 'multichoice';
+                continue;
+            }
+            $kept[] = $question;
+            $seen[] = $text;
+        }
+
+        return [$kept, $droppedtypes];
+    }
+
+    /**
+     * Build the gateway payload for one batch of questions.
+     *
+     * @param \stdClass $topic Topic object
+     * @param array $types Array of question types to generate
+     * @param array $config Configuration
+     * @return array Gateway payload
+     */
+    private static function build_batch_payload(\stdClass $topic, array $types, array $config): array {
+        global $DB;
+
         $requestid = $config['requestid'] ?? ($topic->requestid ?? 0);
 
         // Get distributions from config.
@@ -333,20 +452,24 @@ class question_generator {
             'analyze' => 15, 'evaluate' => 10, 'create' => 5,
         ];
 
-        // DEDUPLICATION: Get previously generated questions for this request.
+        // DEDUPLICATION: Get the most recent questions generated for this request.
+        // The gateway only reads the last few, so fetch no more than that.
         $existingquestions = [];
         if ($requestid > 0) {
             $rs = $DB->get_recordset(
                 'local_hlai_quizgen_questions',
                 ['requestid' => $requestid],
-                'id ASC',
-                'id, questiontext'
+                'id DESC',
+                'id, questiontext',
+                0,
+                self::EXISTING_QUESTIONS_LIMIT
             );
             foreach ($rs as $rec) {
                 // Store just the first 100 chars of each question for context.
                 $existingquestions[] = substr(strip_tags($rec->questiontext), 0, 100);
             }
             $rs->close();
+            $existingquestions = array_reverse($existingquestions);
         }
 
         // Use FULL content from activities (cached, extracted once per request).
@@ -363,37 +486,46 @@ class question_generator {
             ", title_len=" . strlen($topic->title ?? '') .
             ", content_len=" . strlen($fullcontent), DEBUG_DEVELOPER);
 
-        $payload = [
-            'topic_title' => $topic->title,
-            'topic_content' => $fullcontent,
-            'question_types' => $types,
+        // Field order matters to the gateway's prompt cache: settings shared across requests
+        // come first, per-batch context next, and the large topic content last.
+        return [
             'difficulty_distribution' => $difficultydist,
             'blooms_distribution' => $bloomsdist,
+            'question_types' => $types,
             'num_questions' => count($types),
-            'existing_questions' => $existingquestions,
             'is_regeneration' => $isregeneration,
             'old_question_text' => $oldquestiontext,
-        ];
-
-        // Determine quality mode from config.
-        $quality = $config['processing_mode'] ?? 'balanced';
-
-        // Log gateway call parameters.
-        \local_hlai_quizgen\debug_logger::debug('About to call gateway for question generation', [
+            'existing_questions' => $existingquestions,
             'topic_title' => $topic->title,
-            'payload_content_length' => strlen($payload['topic_content']),
-            'num_questions' => count($types),
-            'quality' => $quality,
-        ], $requestid);
-
-        // Call gateway for question generation.
-        $response = gateway_client::generate_questions($payload, $quality);
+            'topic_content' => $fullcontent,
+        ];
+    }
 
-        \local_hlai_quizgen\debug_logger::debug('Gateway response received', [
-            'questions_returned' => count($response['questions'] ?? []),
-        ], $requestid);
+    /**
+     * Convert a generated question to an object and stamp its ownership fields.
+     *
+     * @param array|\stdClass $questionobj Question returned by the gateway
+     * @param array $context Field values to set, keyed by property name
+     * @return \stdClass Question object
+     */
+    private static function apply_question_context($questionobj, array $context): \stdClass {
+        // Ensure properties are set as object properties.
+        if (!is_object($questionobj)) {
+            $questionobj = (object)$questionobj;
+        }
+        foreach ($context as $field => $value) {
+            $questionobj->$field = $value;
+        }
+        return $questionobj;
+    }
 
-        // Extract questions and tokens from response.
+    /**
+     * Extract questions and token usage from a gateway response.
+     *
+     * @param array $response Gateway response content
+     * @return array Array with 'questions' => array of question objects, 'tokens' => token usage
+     */
+    private static function batch_result_from_response(array $response): array {
         $questions = $response['questions'] ?? [];
         $tokensobj = (object)($response['tokens'] ?? ['prompt' => 0, 'completion' => 0, 'total' => 0]);
 
@@ -426,141 +558,6 @@ class question_generator {
     // NOTE: OLD prompt building functions have been removed.
     // All AI prompts are now server-side on the Human Logic AI Gateway.
 
-    /**
-     * Parse batch AI response into array of question objects.
-     *
-     * @param string $response AI response
-     * @param array $types Expected question types
-     * @return array Array of question objects
-     * @throws \moodle_exception If parsing fails
-     */
-    private static function parse_batch_response(string $response, array $types): array {
-        $response = trim($response);
-
-        // Extract JSON array.
-        // phpcs:disable moodle.Strings.ForbiddenStrings.Found
-        if (preg_match('/```json\\s*(.*?)\\s*```/s', $response, $matches)) {
-            $response = $matches[1];
-        } else if (preg_match('/```\\s*(.*?)\\s*```/s', $response, $matches)) {
-            $response = $matches[1];
-        }
-        // phpcs:enable moodle.Strings.ForbiddenStrings.Found
-
-        $data = json_decode($response, true);
-
-        if (json_last_error() !== JSON_ERROR_NONE) {
-            throw new \moodle_exception(
-                'error:questiongeneration',
-                'local_hlai_quizgen',
-                '',
-                null,
-                'Failed to parse batch JSON: ' . json_last_error_msg()
-            );
-        }
-
-        // Handle both array of questions and single question wrapped in array.
-        if (!isset($data[0]) && isset($data['questiontext'])) {
-            $data = [$data]; // Wrap single question.
-        }
-
-        $questions = [];
-        // FIX: Only process the number of questions we requested (count of $types).
-        $expectedcount = count($types);
-        $actualcount = count($data);
-
-        // Only process the number of questions we requested.
-
-        for ($i = 0; $i < $expectedcount && $i < $actualcount; $i++) {
-            $qdata = $data[$i];
-            $type = $types[$i] ?? 'multichoice';
-            $question = new \stdClass();
-            $question->questiontext = $qdata['questiontext'] ?? '';
-            $question->questiontype = $type;
-            $question->questiontextformat = FORMAT_HTML;
-            // FIX: Ensure generalfeedback is always a string (AI may return array).
-            $genfeedback = $qdata['generalfeedback'] ?? '';
-            if (is_array($genfeedback)) {
-                $genfeedback = json_encode($genfeedback);
-            }
-            $question->generalfeedback = (string) $genfeedback;
-            $question->difficulty = $qdata['difficulty'] ?? 'medium';
-            $question->blooms_level = $qdata['blooms_level'] ?? 'understand';
-            $question->ai_reasoning = $qdata['ai_reasoning'] ?? $qdata['rationale'] ?? '';
-            $question->status = 'pending';
-            $question->answers = $qdata['answers'] ?? [];
-
-            if ($type === 'matching' && isset($qdata['subquestions'])) {
-                $question->subquestions = $qdata['subquestions'];
-            }
-
-            $questions[] = $question;
-        }
-
-        return $questions;
-    }
-
-    /**
-     * Parse AI response into question object.
-     *
-     * @param string $response AI response
-     * @param string $type Question type
-     * @return \stdClass Question object
-     * @throws \moodle_exception If parsing fails
-     */
-    private static function parse_question_response(string $response, string $type): \stdClass {
-        // Extract JSON from response.
-        $response = trim($response);
-
-        // phpcs:disable moodle.Strings.ForbiddenStrings.Found
-        if (preg_match('/```json\s*(.*?)\s*```/s', $response, $matches)) {
-            $response = $matches[1];
-        } else if (preg_match('/```\s*(.*?)\s*```/s', $response, $matches)) {
-            $response = $matches[1];
-        }
-        // phpcs:enable moodle.Strings.ForbiddenStrings.Found
-
-        $data = json_decode($response, true);
-
-        if (json_last_error() !== JSON_ERROR_NONE) {
-            throw new \moodle_exception(
-                'error:questiongeneration',
-                'local_hlai_quizgen',
-                '',
-                null,
-                'Failed to parse question JSON: ' . json_last_error_msg()
-            );
-        }
-
-        // Convert to question object.
-        $question = new \stdClass();
-        $question->questiontext = $data['questiontext'] ?? '';
-        $question->questiontype = $type;
-        $question->questiontextformat = FORMAT_HTML;
-        // FIX: Ensure generalfeedback is always a string (AI may return array).
-        $genfeedback = $data['generalfeedback'] ?? '';
-        if (is_array($genfeedback)) {
-            $genfeedback = json_encode($genfeedback);
-        }
-        $question->generalfeedback = (string) $genfeedback;
-        $question->difficulty = $data['difficulty'] ?? 'medium';
-        $question->blooms_level = $data['blooms_level'] ?? 'understand';
-        $question->ai_reasoning = $data['ai_reasoning'] ?? '';
-        $question->status = 'pending';
-        $question->answers = $data['answers'] ?? [];
-
-        // For essay questions, store grading criteria.
-        if ($type === 'essay' && isset($data['grading_criteria'])) {
-            $question->grading_criteria = json_encode($data['grading_criteria']);
-        }
-
-        // For matching questions, store subquestions.
-        if ($type === 'matching' && isset($data['subquestions'])) {
-            $question->subquestions = $data['subquestions'];
-        }
-
-        return $question;
-    }
-
     /**
      * Save question to database.
      *
@@ -573,8 +570,10 @@ class question_generator {
         $now = time();
 
         // Validate question before saving if validation is enabled.
-        $validationenabled = get_config('local_hlai_quizgen', 'enable_question_validation') !== '0';
-        if ($validationenabled && class_exists('\\local_hlai_quizgen\\question_validator')) {
+        if (self::$validationenabled === null) {
+            self::$validationenabled = get_config('local_hlai_quizgen', 'enable_question_validation') !== '0';
+        }
+        if (self::$validationenabled && class_exists('\\local_hlai_quizgen\\question_validator')) {
             $validation = \local_hlai_quizgen\question_validator::validate_question(
                 $question,
                 $question->answers ?? []
@@ -821,11 +820,12 @@ class question_generator {
     private static function get_full_content_for_request(\stdClass $request): string {
         global $DB;
 
-        $fullcontent = '';
+        // Collect sections and join once at the end rather than growing one string.
+        $parts = [];
 
         // Get manual text from custom_instructions.
         if (!empty($request->custom_instructions)) {
-            $fullcontent .= $request->custom_instructions . "\n\n";
+            $parts[] = $request->custom_instructions . "\n\n";
         }
 
         // Get uploaded files.
@@ -841,8 +841,8 @@ class question_generator {
                 try {
                     $result = \local_hlai_quizgen\content_extractor::extract_from_file($filepath, $filename);
                     if (!empty($result['text'])) {
-                        $fullcontent .= "\n\n=== Content from $filename ===\n\n";
-                        $fullcontent .= $result['text'];
+                        $parts[] = "\n\n=== Content from $filename ===\n\n";
+                        $parts[] = $result['text'];
                     }
                 } catch (\Exception $e) {
                     // Silently skip files that fail to extract.
@@ -870,7 +870,7 @@ class question_generator {
                                 $activityids
                             );
                             if (!empty(trim($activitycontent))) {
-                                $fullcontent .= "\n\n" . $activitycontent;
+                                $parts[] = "\n\n" . $activitycontent;
                             }
                         } catch (\Exception $e) {
                             // Silently skip activities that fail to extract.
@@ -883,7 +883,7 @@ class question_generator {
                     try {
                         $scanresult = \local_hlai_quizgen\course_scanner::scan_entire_course($request->courseid);
                         if (!empty(trim($scanresult['text']))) {
-                            $fullcontent .= "\n\n" . $scanresult['text'];
+                            $parts[] = "\n\n" . $scanresult['text'];
                         }
                     } catch (\Exception $e) {
                         // Fallback to stored topic data if re-extraction fails.
@@ -892,11 +892,11 @@ class question_generator {
                         ], 'id ASC');
                         foreach ($topics as $topic) {
                             if (!empty($topic->description)) {
-                                $fullcontent .= "\n\n=== TOPIC: {$topic->title} ===\n\n";
-                                $fullcontent .= $topic->description;
+                                $parts[] = "\n\n=== TOPIC: {$topic->title} ===\n\n";
+                                $parts[] = $topic->description;
                             }
                             if (!empty($topic->content_excerpt)) {
-                                $fullcontent .= "\n\n" . $topic->content_excerpt;
+                                $parts[] = "\n\n" . $topic->content_excerpt;
                             }
                         }
                     }
@@ -907,12 +907,12 @@ class question_generator {
         // Get URL content using recordset for memory-efficient processing.
         $rs = $DB->get_recordset('local_hlai_quizgen_urlcont', ['requestid' => $request->id]);
         foreach ($rs as $url) {
-            $fullcontent .= "\n\n=== Content from {$url->title} ===\n\n";
-            $fullcontent .= $url->content;
+            $parts[] = "\n\n=== Content from {$url->title} ===\n\n";
+            $parts[] = $url->content;
         }
         $rs->close();
 
         // Return full content (trimmed).
-        return trim($fullcontent);
+        return trim(implode('', $parts));
     }
 }
@@ -58,6 +58,49 @@ class question_validator {
     /** @var int Poor quality threshold. */
     const QUALITY_POOR = 30;
 
+    /** @var float Similarity at which two questions count as duplicates (lower values flag same-topic questions). */
+    const DUPLICATE_SIMILARITY = 0.85;
+
+    /** @var string Phrasing that suggests an EASY (recall-based) question. */
+    const EASY_QUESTION_PATTERN = '/^(?:what is |which (?:of the following )?is|name the|list the|identify the|' .
+        'true or false|define )/';
+
+    /** @var string Phrasing that suggests a HARD (analysis/evaluation) question. */
+    const HARD_QUESTION_PATTERN = '/analyze|evaluate|compare and contrast|what would happen if|in (?:this |the )?scenario|' .
+        'best (?:approach|solution|method|practice)|most (?:appropriate|effective|likely)|implications of|' .
+        'consequences of|critically|synthesize|design a/';
+
+    /** @var array Placeholder fragments that mark unfinished question text. */
+    const PLACEHOLDER_TEXTS = ['lorem ipsum', 'todo', 'tbd', 'xxx', 'placeholder', '[insert', 'fill in'];
+
+    /** @var array Phrases that ask about delivery format instead of content, with the reason. */
+    const DELIVERY_FORMAT_PHRASES = [
+        'what is scorm' => 'Asking about SCORM format instead of content',
+        'why do students need' => 'Asking about why students need to do something',
+        'why is this lesson' => 'Asking about lesson format instead of content',
+        'what is this module' => 'Asking about module format instead of content',
+        'what is the purpose of this activity' => 'Asking about activity purpose instead of content',
+        'why should students complete' => 'Asking about completion instead of content',
+        'what is the benefit of completing' => 'Asking about completion benefits instead of content',
+        'how does this lesson' => 'Asking about lesson mechanics instead of content',
+        'what format is' => 'Asking about format instead of content',
+        'what type of activity' => 'Asking about activity type instead of content',
+        'how many pages' => 'Asking about structural elements instead of content',
+        'how long is this' => 'Asking about length instead of content',
+        'what is the navigation' => 'Asking about navigation instead of content',
+    ];
+
+    /** @var array Patterns for questions that only define a module type, with the reason. */
+    const GENERIC_MODULE_PATTERNS = [
+        '/^what is a scorm(\s|$|\?)/i' => 'Asking what SCORM is',
+        '/^what is a lesson(\s|$|\?)/i' => 'Asking what a lesson is',
+        '/^what is a forum(\s|$|\?)/i' => 'Asking what a forum is',
+        '/^what is a page(\s|$|\?)/i' => 'Asking what a page is',
+        '/^what is a book(\s|$|\?)/i' => 'Asking what a book is (the module type)',
+        '/^why use scorm/i' => 'Asking why use SCORM',
+        '/^why use a lesson/i' => 'Asking why use lessons',
+    ];
+
     /**
      * Validate a generated question.
      *
@@ -353,8 +396,7 @@ class question_validator {
         $lowercaseptext = strtolower($questiontext);
 
         // Check for incomplete or placeholder text.
-        $placeholders = ['lorem ipsum', 'todo', 'tbd', 'xxx', 'placeholder', '[insert', 'fill in'];
-        foreach ($placeholders as $placeholder) {
+        foreach (self::PLACEHOLDER_TEXTS as $placeholder) {
             if (stripos($questiontext, $placeholder) !== false) {
                 $result['issues'][] = 'Question contains placeholder text: ' . $placeholder;
                 $result['score'] -= 25;
@@ -363,23 +405,7 @@ class question_validator {
 
         // CHECK FOR DUMB QUESTIONS ABOUT DELIVERY FORMAT (SCORM, Lesson, Module, etc.).
         // These questions are about the platform/format, not the educational content.
-        $deliveryformatpatterns = [
-            'what is scorm' => 'Asking about SCORM format instead of content',
-            'why do students need' => 'Asking about why students need to do something',
-            'why is this lesson' => 'Asking about lesson format instead of content',
-            'what is this module' => 'Asking about module format instead of content',
-            'what is the purpose of this activity' => 'Asking about activity purpose instead of content',
-            'why should students complete' => 'Asking about completion instead of content',
-            'what is the benefit of completing' => 'Asking about completion benefits instead of content',
-            'how does this lesson' => 'Asking about lesson mechanics instead of content',
-            'what format is' => 'Asking about format instead of content',
-            'what type of activity' => 'Asking about activity type instead of content',
-            'how many pages' => 'Asking about structural elements instead of content',
-            'how long is this' => 'Asking about length instead of content',
-            'what is the navigation' => 'Asking about navigation instead of content',
-        ];
-
-        foreach ($deliveryformatpatterns as $pattern => $reason) {
+        foreach (self::DELIVERY_FORMAT_PHRASES as $pattern => $reason) {
             if (strpos($lowercaseptext, $pattern) !== false) {
                 $result['issues'][] = 'Question is about delivery format, not educational content: ' . $reason;
                 $result['score'] -= 40;
@@ -388,17 +414,7 @@ class question_validator {
         }
 
         // Check if question is ONLY about generic module types without educational context.
-        $genericmodulepatterns = [
-            '/^what is a scorm(\s|$|\?)/i' => 'Asking what SCORM is',
-            '/^what is a lesson(\s|$|\?)/i' => 'Asking what a lesson is',
-            '/^what is a forum(\s|$|\?)/i' => 'Asking what a forum is',
-            '/^what is a page(\s|$|\?)/i' => 'Asking what a page is',
-            '/^what is a book(\s|$|\?)/i' => 'Asking what a book is (the module type)',
-            '/^why use scorm/i' => 'Asking why use SCORM',
-            '/^why use a lesson/i' => 'Asking why use lessons',
-        ];
-
-        foreach ($genericmodulepatterns as $pattern => $reason) {
+        foreach (self::GENERIC_MODULE_PATTERNS as $pattern => $reason) {
             if (preg_match($pattern, $questiontext)) {
                 $result['issues'][] = 'Question is about module type definition: ' . $reason;
                 $result['score'] -= 50;
@@ -450,57 +466,20 @@ class question_validator {
         $questiontext = strtolower(strip_tags($question->questiontext ?? ''));
         $difficulty = $question->difficulty ?? 'medium';
 
-        // Patterns that suggest EASY questions (recall-based).
-        $easypatterns = [
-            '/^what is (the |a |an )?/', '/^which (of the following )?is/',
-            '/^name the/', '/^list the/', '/^identify the/',
-            '/^true or false/', '/^define /',
-        ];
-
-        // Patterns that suggest HARD questions (analysis/evaluation).
-        $hardpatterns = [
-            '/analyze/', '/evaluate/', '/compare and contrast/',
-            '/what would happen if/', '/in (this |the )?scenario/',
-            '/best (approach|solution|method|practice)/',
-            '/most (appropriate|effective|likely)/',
-            '/implications of/', '/consequences of/',
-            '/critically/', '/synthesize/', '/design a/',
-        ];
-
         // Check for mismatch: question marked easy but has hard patterns.
-        if ($difficulty === 'easy') {
-            foreach ($hardpatterns as $pattern) {
-                if (preg_match($pattern, $questiontext)) {
-                    $result['warnings'][] = 'Question marked as EASY but appears to require analysis/evaluation';
-                    $result['score'] -= 5;
-                    break;
-                }
-            }
+        if ($difficulty === 'easy' && preg_match(self::HARD_QUESTION_PATTERN, $questiontext)) {
+            $result['warnings'][] = 'Question marked as EASY but appears to require analysis/evaluation';
+            $result['score'] -= 5;
         }
 
         // Check for mismatch: question marked hard but has only easy patterns.
-        if ($difficulty === 'hard') {
-            $haseasypatternsonly = false;
-            foreach ($easypatterns as $pattern) {
-                if (preg_match($pattern, $questiontext)) {
-                    $haseasypatternsonly = true;
-                    break;
-                }
-            }
-            // Only flag if it matches easy patterns AND doesn't match any hard patterns.
-            if ($haseasypatternsonly) {
-                $hashardpattern = false;
-                foreach ($hardpatterns as $pattern) {
-                    if (preg_match($pattern, $questiontext)) {
-                        $hashardpattern = true;
-                        break;
-                    }
-                }
-                if (!$hashardpattern) {
-                    $result['warnings'][] = 'Question marked as HARD but appears to be simple recall';
-                    $result['score'] -= 5;
-                }
-            }
+        if (
+            $difficulty === 'hard' &&
+            preg_match(self::EASY_QUESTION_PATTERN, $questiontext) &&
+            !preg_match(self::HARD_QUESTION_PATTERN, $questiontext)
+        ) {
+            $result['warnings'][] = 'Question marked as HARD but appears to be simple recall';
+            $result['score'] -= 5;
         }
 
         // Check for feedback.
@@ -634,8 +613,7 @@ class question_validator {
                 // Calculate similarity using multiple methods.
                 $similarity = self::calculate_question_similarity($q1, $q2);
 
-                // Threshold: 85% similar is considered a duplicate (lower values cause false positives on same-topic questions).
-                if ($similarity >= 0.85) {
+                if ($similarity >= self::DUPLICATE_SIMILARITY) {
                     $duplicates[] = [
                         'index1' => $i,
                         'index2' => $j,
@@ -650,6 +628,31 @@ class question_validator {
         return $duplicates;
     }
 
+    /**
+     * Check whether a question repeats any of the given questions.
+     *
+     * Uses the same comparison and threshold as check_for_duplicates().
+     *
+     * @param string $question Question text to check
+     * @param array $others Question texts to compare against
+     * @return bool True if the question is a duplicate of one of $others
+     */
+    public static function is_duplicate(string $question, array $others): bool {
+        $q1 = strtolower(strip_tags($question));
+        if (strlen($q1) < 20) {
+            return false;
+        }
+
+        foreach ($others as $other) {
+            $q2 = strtolower(strip_tags($other));
+            if (strlen($q2) >= 20 && self::calculate_question_similarity($q1, $q2) >= self::DUPLICATE_SIMILARITY) {
+                return true;
+            }
+        }
+
+        return false;
+    }
+
     /**
      * Calculate similarity between two question texts.
      *
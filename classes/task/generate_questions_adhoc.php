@@ -40,6 +40,10 @@ class generate_questions_adhoc extends \core\task\adhoc_task {
         $data = $this->get_custom_data();
         $requestid = $data->request_id;
 
+        // Task runners can outlive a settings change; start each run from the current config.
+        \local_hlai_quizgen\gateway_client::reset_caches();
+        \local_hlai_quizgen\question_generator::reset_caches();
+
         // Log task start.
         \local_hlai_quizgen\debug_logger::info('Adhoc task started', [
             'task' => 'generate_questions_adhoc',
@@ -148,6 +152,9 @@ class generate_questions_adhoc extends \core\task\adhoc_task {
                 'global_question_types' => $globalquestiontypes, // Pass the expanded global array.
             ];
 
+            // Topics usually share the same distribution JSON, so decode each distinct string once.
+            $decodeddistributions = [];
+
             // Generate questions for each topic with progress updates.
             foreach ($topics as $topic) {
                 // Update progress for this topic.
@@ -164,11 +171,14 @@ class generate_questions_adhoc extends \core\task\adhoc_task {
                 $topicconfig['global_question_index'] = $currentquestion;
 
                 // ITEM 7 FIX: Use topic-specific distributions if available, fallback to request-level.
-                if (!empty($topic->difficulty_distribution)) {
-                    $topicconfig['difficulty_distribution'] = json_decode($topic->difficulty_distribution, true);
-                }
-                if (!empty($topic->blooms_distribution)) {
-                    $topicconfig['blooms_distribution'] = json_decode($topic->blooms_distribution, true);
+                foreach (['difficulty_distribution', 'blooms_distribution'] as $field) {
+                    if (empty($topic->$field)) {
+                        continue;
+                    }
+                    if (!isset($decodeddistributions[$topic->$field])) {
+                        $decodeddistributions[$topic->$field] = json_decode($topic->$field, true);
+                    }
+                    $topicconfig[$field] = $decodeddistributions[$topic->$field];
                 }
 
                 // CRITICAL FIX: Extract this topic's slice from the global question types array.
@@ -188,6 +198,23 @@ class generate_questions_adhoc extends \core\task\adhoc_task {
                 }
                 $topicconfig['question_types'] = !empty($topicquestiontypes) ? $topicquestiontypes : ['multichoice'];
 
+                // Move the progress bar forward as each batch of this topic is saved.
+                $topicstart = $currentquestion;
+                $generatedbefore = $totalquestionsgenerated;
+                $topicconfig['progress_callback'] = function (int $saved, int $requested) use (
+                    $requestid,
+                    $topicstart,
+                    $generatedbefore,
+                    $totalquestionsrequested
+                ) {
+                    self::update_progress(
+                        $requestid,
+                        'processing',
+                        (($topicstart + min($saved, $requested)) / $totalquestionsrequested) * 100,
+                        'Generated ' . ($generatedbefore + $saved) . " of {$totalquestionsrequested} questions (processing)"
+                    );
+                };
+
                 // Generate questions for this topic.
                 $questions = \local_hlai_quizgen\question_generator::generate_for_topic(
                     $topic->id,
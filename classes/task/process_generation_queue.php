@@ -50,6 +50,10 @@ class process_generation_queue extends \core\task\scheduled_task {
 
         mtrace('AI Quiz Generator: Processing generation queue...');
 
+        // Task runners can outlive a settings change; start each run from the current config.
+        \local_hlai_quizgen\gateway_client::reset_caches();
+        \local_hlai_quizgen\question_generator::reset_caches();
+
         // Find pending requests.
         $requests = $DB->get_records('local_hlai_quizgen_requests', ['status' => 'pending'], 'timecreated ASC', '*', 0, 5);
 
@@ -147,38 +151,27 @@ class process_generation_queue extends \core\task\scheduled_task {
 
             mtrace('  Processing topic: ' . $topic->title . ' (' . $topic->num_questions . ' questions)');
 
-            // Distribute questions by difficulty.
-            $questionsbydiff = $this->distribute_by_difficulty(
-                $topic->num_questions,
-                $config['difficulty_distribution']
+            // Generate the whole topic in one pass: the difficulty distribution travels in the
+            // payload, so the gateway mixes difficulties within each batch of questions.
+            $topicconfig = $config;
+            $topicconfig['num_questions'] = $topic->num_questions;
+            $topicconfig['global_question_index'] = $globalquestionindex; // Pass global index.
+
+            // Generate questions.
+            $questions = \local_hlai_quizgen\question_generator::generate_for_topic(
+                $topic->id,
+                $request->id,
+                $topicconfig
             );
 
-            foreach ($questionsbydiff as $difficulty => $count) {
-                if ($count <= 0) {
-                    continue;
-                }
-
-                $topicconfig = $config;
-                $topicconfig['difficulty'] = $difficulty;
-                $topicconfig['num_questions'] = $count;
-                $topicconfig['global_question_index'] = $globalquestionindex; // Pass global index.
-
-                // Generate questions.
-                $questions = \local_hlai_quizgen\question_generator::generate_for_topic(
-                    $topic->id,
-                    $request->id,
-                    $topicconfig
-                );
+            // Update global index after generating questions.
+            $globalquestionindex += count($questions);
 
-                // Update global index after generating questions.
-                $globalquestionindex += count($questions);
+            $totalgenerated += count($questions);
+            mtrace('    Generated ' . count($questions) . ' questions');
 
-                $totalgenerated += count($questions);
-                mtrace('    Generated ' . count($questions) . ' ' . $difficulty . ' questions');
-
-                // Update progress.
-                $DB->set_field('local_hlai_quizgen_requests', 'questions_generated', $totalgenerated, ['id' => $request->id]);
-            }
+            // Update progress.
+            $DB->set_field('local_hlai_quizgen_requests', 'questions_generated', $totalgenerated, ['id' => $request->id]);
         }
 
         // Mark as completed using centralized status tracking.
@@ -190,40 +183,6 @@ class process_generation_queue extends \core\task\scheduled_task {
         $this->send_completion_notification($request);
     }
 
-    /**
-     * Distribute questions by difficulty.
-     *
-     * @param int $total Total questions
-     * @param array $distribution Difficulty distribution (e.g., ['easy' => 30, 'medium' => 50, 'hard' => 20])
-     * @return array Questions per difficulty
-     */
-    private function distribute_by_difficulty(int $total, array $distribution): array {
-        $result = [
-            'easy' => 0,
-            'medium' => 0,
-            'hard' => 0,
-        ];
-
-        if (empty($distribution)) {
-            // Default distribution.
-            $distribution = ['easy' => 20, 'medium' => 60, 'hard' => 20];
-        }
-
-        // Calculate based on percentages.
-        foreach ($distribution as $difficulty => $percentage) {
-            $result[$difficulty] = round(($percentage / 100) * $total);
-        }
-
-        // Adjust for rounding errors.
-        $sum = array_sum($result);
-        if ($sum != $total) {
-            $diff = $total - $sum;
-            $result['medium'] += $diff;  // Add/subtract difference to medium.
-        }
-
-        return $result;
-    }
-
     /**
      * Mark request as failed.
      *
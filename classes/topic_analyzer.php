@@ -31,6 +31,21 @@ namespace local_hlai_quizgen;
  * Topic analyzer class.
  */
 class topic_analyzer {
+    /** @var array Module type prefixes stripped from topic titles. */
+    const TITLE_PREFIXES = [
+        'SCORM:', 'SECTION:', 'COURSE:', 'LESSON:', 'FORUM:', 'PAGE:',
+        'BOOK:', 'RESOURCE:', 'MODULE:', 'ACTIVITY:', 'TOPIC:',
+        'LABEL:', 'FOLDER:', 'URL:', 'FILE:', 'QUIZ:', 'ASSIGNMENT:',
+        'WORKSHOP:', 'GLOSSARY:', 'WIKI:', 'CHOICE:', 'FEEDBACK:',
+        'SURVEY:', 'DATABASE:', 'CHAT:', 'H5P:', 'LTI:',
+    ];
+
+    /** @var array Marker names that are only a module type, keyed for isset() lookup. */
+    const MODULE_ONLY_NAMES = [
+        'scorm' => true, 'lesson' => true, 'forum' => true, 'page' => true, 'book' => true,
+        'resource' => true, 'label' => true, 'url' => true, 'folder' => true,
+    ];
+
     /**
      * Analyze content and extract topics.
      *
@@ -58,11 +73,7 @@ class topic_analyzer {
             );
         }
 
-        // Check cache first if enabled.
         $request = $DB->get_record('local_hlai_quizgen_requests', ['id' => $requestid], 'courseid');
-        $cachekey = cache_manager::generate_topic_cache_key($content, $request->courseid);
-
-        // Topic caching disabled for now.
 
         // STRATEGY: Handle content that may contain a mix of marker-based content
         // (from course activities/bulk scans) and non-marker content (uploaded files,
@@ -87,13 +98,39 @@ class topic_analyzer {
         // If we have non-marker content, send it to AI for topic analysis.
         $aitopics = [];
         if (!empty($nonmarkercontent) && strlen($nonmarkercontent) > 50) {
+            // Reuse the gateway's analysis when the same content was analysed before.
+            $cachekey = cache_manager::generate_topic_cache_key($nonmarkercontent, $request->courseid);
+            $cachedtopics = cache_manager::is_caching_enabled()
+                ? cache_manager::get_cached_response('topics', $cachekey)
+                : null;
+
+            // Another request analysing the same content fills the cache; wait for it rather than repeat the call.
+            $lock = false;
+            if (!is_array($cachedtopics) && cache_manager::is_caching_enabled()) {
+                $lock = cache_manager::get_fill_lock('topics', $cachekey);
+                if ($lock) {
+                    $cachedtopics = cache_manager::get_cached_response('topics', $cachekey);
+                }
+            }
+
             try {
-                $payload = [
-                    'content' => $nonmarkercontent,
-                    'courseid' => $request->courseid,
-                ];
-                $response = gateway_client::analyze_topics($payload, 'best');
-                $aitopics = $response['topics'] ?? [];
+                if (is_array($cachedtopics)) {
+                    $aitopics = $cachedtopics;
+                } else {
+                    $payload = [
+                        'content' => $nonmarkercontent,
+                        'courseid' => $request->courseid,
+                    ];
+                    $response = gateway_client::analyze_topics($payload, 'best');
+                    $aitopics = $response['topics'] ?? [];
+
+                    if (!empty($aitopics) && cache_manager::is_caching_enabled()) {
+                        cache_manager::set_cached_response('topics', $cachekey, $aitopics, [
+                            'requestid' => $requestid,
+                            'courseid' => $request->courseid,
+                        ]);
+                    }
+                }
             } catch (\Exception $e) {
                 // If AI fails but we have marker topics, continue with those.
                 if (empty($markertopics)) {
@@ -105,6 +142,10 @@ class topic_analyzer {
                         $e->getMessage()
                     );
                 }
+            } finally {
+                if ($lock) {
+                    $lock->release();
+                }
             }
         }
 
@@ -133,84 +174,12 @@ class topic_analyzer {
         }
 
         // Save topics to database.
-        $savedtopics = self::save_topics($uniquetopics, $requestid);
-
-        // Cache the topics if enabled.
-        if (cache_manager::is_caching_enabled()) {
-            cache_manager::set_cached_response('topics', $cachekey, $uniquetopics, [
-                'requestid' => $requestid,
-                'courseid' => $request->courseid,
-            ]);
-        }
-
-        return $savedtopics;
+        return self::save_topics($uniquetopics, $requestid);
     }
 
     // NOTE: AI prompts are proprietary and located on the Human Logic AI Gateway server.
     // This plugin only sends data payloads to the gateway. All prompt engineering is server-side.
 
-    /**
-     * Parse AI response to extract topics.
-     *
-     * @param string $response AI response text
-     * @return array Array of topic data
-     * @throws \moodle_exception If parsing fails
-     */
-    private static function parse_topic_response(string $response): array {
-        // Try to extract JSON from response.
-        // Sometimes AI adds markdown code blocks.
-        $response = trim($response);
-
-        // Remove markdown code blocks if present.
-        // phpcs:disable moodle.Strings.ForbiddenStrings.Found
-        if (preg_match('/```json\s*(.*?)\s*```/s', $response, $matches)) {
-            $response = $matches[1];
-        } else if (preg_match('/```\s*(.*?)\s*```/s', $response, $matches)) {
-            $response = $matches[1];
-        }
-        // phpcs:enable moodle.Strings.ForbiddenStrings.Found
-
-        $data = json_decode($response, true);
-
-        if (json_last_error() !== JSON_ERROR_NONE) {
-            throw new \moodle_exception(
-                'error:topicanalysis',
-                'local_hlai_quizgen',
-                '',
-                null,
-                'Failed to parse AI response as JSON: ' .
-                    json_last_error_msg() .
-                    ' | Response preview: ' .
-                    substr($response, 0, 200)
-            );
-        }
-
-        if (empty($data['topics'])) {
-            throw new \moodle_exception(
-                'error:topicanalysis',
-                'local_hlai_quizgen',
-                '',
-                null,
-                'No topics found in AI response'
-            );
-        }
-
-        // Filter out invalid topics (numbers, symbols, exercises).
-        $data['topics'] = self::filter_invalid_topics($data['topics']);
-
-        if (empty($data['topics'])) {
-            throw new \moodle_exception(
-                'error:topicanalysis',
-                'local_hlai_quizgen',
-                '',
-                null,
-                'No valid topics found after filtering'
-            );
-        }
-
-        return $data['topics'];
-    }
-
     /**
      * Extract topics directly from TOPIC markers in content.
      *
@@ -239,8 +208,7 @@ class topic_analyzer {
                 }
 
                 // Skip generic module-only names.
-                $lowername = strtolower($name);
-                if (in_array($lowername, ['scorm', 'lesson', 'forum', 'page', 'book', 'resource', 'label', 'url', 'folder'])) {
+                if (isset(self::MODULE_ONLY_NAMES[strtolower($name)])) {
                     continue;
                 }
 
@@ -320,130 +288,6 @@ class topic_analyzer {
         return $uniquetopics;
     }
 
-    /**
-     * Filter out invalid topics and clean up topic titles.
-     *
-     * @param array $topics Array of topics to filter
-     * @return array Filtered and cleaned topics
-     */
-    private static function filter_invalid_topics(array $topics): array {
-        $validtopics = [];
-
-        foreach ($topics as $topic) {
-            $title = trim($topic['title'] ?? '');
-
-            // Skip if empty.
-            if (empty($title)) {
-                continue;
-            }
-
-            // CLEAN UP: Remove module type prefixes from titles.
-            // "SCORM: Control Safety Hazards" -> "Control Safety Hazards".
-            // "SECTION: Valves: Introduction" -> "Valves: Introduction".
-            // "COURSE: Valves" -> "Valves".
-            $title = self::clean_topic_title($title);
-            $topic['title'] = $title;
-
-            // Skip if empty after cleaning.
-            if (empty($title)) {
-                continue;
-            }
-
-            // Skip pure numbers (1, 2, 3.5, etc.).
-            if (is_numeric($title)) {
-                continue;
-            }
-
-            // Skip single characters or symbols.
-            if (strlen($title) <= 2 && !ctype_alnum($title)) {
-                continue;
-            }
-
-            // Skip if title is ONLY a generic module name (no actual content).
-            $lowertitle = strtolower($title);
-            $genericonlynames = [
-                'scorm', 'scorm package', 'scorm module',
-                'lesson', 'lesson module',
-                'forum', 'forum module',
-                'page', 'page module',
-                'book', 'book module',
-                'resource', 'file', 'url', 'label', 'folder',
-                'assignment', 'quiz', 'workshop', 'glossary',
-                'wiki', 'choice', 'feedback', 'survey',
-                'database', 'chat', 'external tool', 'lti', 'h5p',
-                'section', 'course', 'module', 'activity', 'topic',
-            ];
-
-            $skipthis = false;
-            foreach ($genericonlynames as $genericname) {
-                // Only skip if title is EXACTLY or ONLY the generic name (with optional number).
-                if (preg_match('/^' . preg_quote($genericname, '/') . '\s*\d*$/i', $title)) {
-                    $skipthis = true;
-                    break;
-                }
-            }
-
-            if ($skipthis) {
-                continue;
-            }
-
-            // Skip exercise-only markers.
-            $excludepatterns = ['exercise', 'practice', 'worksheet', 'test', 'exam', 'homework'];
-            foreach ($excludepatterns as $pattern) {
-                if (preg_match('/^' . $pattern . '\s*\d*$/i', $title)) {
-                    $skipthis = true;
-                    break;
-                }
-            }
-
-            if ($skipthis) {
-                continue;
-            }
-
-            // Topic is valid - also clean subtopics.
-            if (!empty($topic['subtopics'])) {
-                $topic['subtopics'] = self::filter_invalid_topics($topic['subtopics']);
-            }
-
-            $validtopics[] = $topic;
-        }
-
-        // DEDUPLICATION: Remove duplicate topics (same title after cleaning).
-        $validtopics = self::remove_duplicate_topics($validtopics);
-
-        return $validtopics;
-    }
-
-    /**
-     * Remove duplicate topics based on cleaned title.
-     *
-     * After removing prefixes like "SCORM:" and "SECTION:", topics may have identical titles.
-     * Keep only the first occurrence of each unique title.
-     *
-     * @param array $topics Array of topics
-     * @return array Deduplicated topics
-     */
-    private static function remove_duplicate_topics(array $topics): array {
-        $seentitles = [];
-        $uniquetopics = [];
-
-        foreach ($topics as $topic) {
-            // Normalize title for comparison (lowercase, trim whitespace).
-            $normalizedtitle = strtolower(trim($topic['title'] ?? ''));
-
-            // Skip if we've already seen this title.
-            if (isset($seentitles[$normalizedtitle])) {
-                continue;
-            }
-
-            // Mark this title as seen.
-            $seentitles[$normalizedtitle] = $topic['title'];
-            $uniquetopics[] = $topic;
-        }
-
-        return $uniquetopics;
-    }
-
     /**
      * Clean up garbled text from PDF extraction.
      *
@@ -534,19 +378,10 @@ class topic_analyzer {
      * @return string Cleaned topic title
      */
     private static function clean_topic_title(string $title): string {
-        // List of prefixes to remove (case-insensitive).
-        $prefixestoremove = [
-            'SCORM:', 'SECTION:', 'COURSE:', 'LESSON:', 'FORUM:', 'PAGE:',
-            'BOOK:', 'RESOURCE:', 'MODULE:', 'ACTIVITY:', 'TOPIC:',
-            'LABEL:', 'FOLDER:', 'URL:', 'FILE:', 'QUIZ:', 'ASSIGNMENT:',
-            'WORKSHOP:', 'GLOSSARY:', 'WIKI:', 'CHOICE:', 'FEEDBACK:',
-            'SURVEY:', 'DATABASE:', 'CHAT:', 'H5P:', 'LTI:',
-        ];
-
         $originaltitle = $title;
 
-        // Remove prefix if present at the start.
-        foreach ($prefixestoremove as $prefix) {
+        // Remove prefix if present at the start (case-insensitive).
+        foreach (self::TITLE_PREFIXES as $prefix) {
             if (stripos($title, $prefix) === 0) {
                 $title = trim(substr($title, strlen($prefix)));
                 break; // Only remove one prefix.
@@ -33,7 +33,7 @@ $expectedtoken = get_config('local_hlai_quizgen', 'health_check_token');
 if (empty($expectedtoken)) {
     require_login();
     require_capability('moodle/site:config', context_system::instance());
-} else if (!hash_equals($expectedtoken, $token)) {
+} else if ($token === '' || !hash_equals((string)$expectedtoken, $token)) {
     http_response_code(401);
     echo json_encode(['status' => 'error', 'message' => get_string('health_invalid_token', 'local_hlai_quizgen')]);
     die();
@@ -257,4 +257,4 @@ try {
     http_response_code(500);
 }
 
-echo json_encode($health, JSON_PRETTY_PRINT);
+echo json_encode($health, JSON_PRETTY_PRINT | JSON_UNESCAPED_UNICODE | JSON_UNESCAPED_SLASHES);
@@ -379,6 +379,8 @@ $string['ftar_good'] = 'Good - Room for improvement';
 $string['ftar_needs_attention'] = 'Needs attention - Try more specific topics';
 $string['gateway_heading'] = 'Human Logic AI Service Configuration';
 $string['gateway_heading_desc'] = 'Enter your Human Logic API key to enable AI-powered quiz generation. This plugin requires a commercial license to function. Contact Human Logic Software LLC for access.';
+$string['gateway_max_parallel'] = 'Concurrent AI requests';
+$string['gateway_max_parallel_desc'] = 'Maximum number of question batches sent to the AI service at the same time while generating one topic (1-16, default: 4). Lower this if the service reports rate limiting.';
 $string['gateway_warning_msg'] = 'AI Service not configured. Please enter your API Key below to enable quiz generation.';
 $string['gatewaykey'] = 'AI Service API Key';
 $string['gatewaykey_desc'] = 'Your Human Logic API key (contact support@human-logic.com for access)';
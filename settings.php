@@ -51,12 +51,25 @@ if ($hassiteconfig) {
     ));
 
     // Gateway API Key setting.
-    $settings->add(new admin_setting_configpasswordunmask(
+    $setting = new admin_setting_configpasswordunmask(
         'local_hlai_quizgen/gatewaykey',
         get_string('gatewaykey', 'local_hlai_quizgen'),
         get_string('gatewaykey_desc', 'local_hlai_quizgen'),
         ''
-    ));
+    );
+    $setting->set_updatedcallback('\local_hlai_quizgen\gateway_client::reset_caches');
+    $settings->add($setting);
+
+    // Concurrent gateway requests per generation task.
+    $setting = new admin_setting_configtext(
+        'local_hlai_quizgen/gateway_max_parallel',
+        get_string('gateway_max_parallel', 'local_hlai_quizgen'),
+        get_string('gateway_max_parallel_desc', 'local_hlai_quizgen'),
+        4,
+        PARAM_INT
+    );
+    $setting->set_updatedcallback('\local_hlai_quizgen\gateway_client::reset_caches');
+    $settings->add($setting);
 
     // Settings heading.
     $settings->add(new admin_setting_heading(
@@ -168,12 +181,14 @@ if ($hassiteconfig) {
     ));
 
     // Question validation.
-    $settings->add(new admin_setting_configcheckbox(
+    $setting = new admin_setting_configcheckbox(
         'local_hlai_quizgen/enable_question_validation',
         get_string('enable_question_validation', 'local_hlai_quizgen'),
         get_string('enable_question_validation_desc', 'local_hlai_quizgen'),
         1 // Enabled by default.
-    ));
+    );
+    $setting->set_updatedcallback('\local_hlai_quizgen\question_generator::reset_caches');
+    $settings->add($setting);
 
     // Phase 6: Production Hardening Settings.
     $settings->add(new admin_setting_heading(
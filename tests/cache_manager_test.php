@@ -0,0 +1,75 @@
+<?php
+// This file is part of Moodle - http://moodle.org/
+//
+// Moodle is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+//
+// Moodle is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with Moodle.  If not, see <https://www.gnu.org/licenses/>.
+
+namespace local_hlai_quizgen;
+
+/**
+ * Unit tests for the cache manager.
+ *
+ * @package    local_hlai_quizgen
+ * @category   test
+ * @copyright  2025 Human Logic Software LLC
+ * @license    http://www.gnu.org/copyleft/gpl.html GNU GPL v3 or later
+ * @covers     \local_hlai_quizgen\cache_manager
+ */
+final class cache_manager_test extends \advanced_testcase {
+    /**
+     * Identical payloads share a key; any difference gives a different key.
+     */
+    public function test_generate_gateway_cache_key(): void {
+        $payload = ['topic_title' => 'Valves', 'topic_content' => 'Gate and globe valves.'];
+
+        $key = cache_manager::generate_gateway_cache_key('generate_questions', 'fast', $payload);
+        $this->assertSame($key, cache_manager::generate_gateway_cache_key('generate_questions', 'fast', $payload));
+        $this->assertStringStartsWith('gateway_generate_questions_', $key);
+
+        $this->assertNotSame($key, cache_manager::generate_gateway_cache_key('generate_questions', 'best', $payload));
+        $other = ['topic_title' => 'Pumps'] + $payload;
+        $this->assertNotSame($key, cache_manager::generate_gateway_cache_key('generate_questions', 'fast', $other));
+    }
+
+    /**
+     * Paragraph order and whitespace do not change the topic key, and multi-byte text is not split.
+     */
+    public function test_generate_topic_cache_key(): void {
+        $key = cache_manager::generate_topic_cache_key("First  paragraph.\n\nSecond paragraph.", 5);
+        $this->assertSame($key, cache_manager::generate_topic_cache_key("Second paragraph.\r\n\r\nFirst paragraph.", 5));
+        $this->assertNotSame($key, cache_manager::generate_topic_cache_key("First paragraph.\n\nSecond paragraph.", 6));
+
+        // "х" is 0xD1 0x85 in UTF-8; reading 0x85 as a line break would split it and break order independence.
+        $this->assertSame(
+            cache_manager::generate_topic_cache_key("ах\n\nбх", 5),
+            cache_manager::generate_topic_cache_key("бх\n\nах", 5)
+        );
+    }
+
+    /**
+     * Payloads with malformed UTF-8 from different courses do not collide on one key.
+     */
+    public function test_generate_gateway_cache_key_invalid_utf8(): void {
+        $first = ['topic_title' => "Valves \xC3\x28", 'topic_content' => "Course A \xFF"];
+        $second = ['topic_title' => "Pumps \xC3\x28", 'topic_content' => "Course B \xFE"];
+
+        $this->assertNotSame(
+            cache_manager::generate_gateway_cache_key('generate_questions', 'fast', $first),
+            cache_manager::generate_gateway_cache_key('generate_questions', 'fast', $second)
+        );
+        $this->assertNotSame(
+            cache_manager::generate_gateway_cache_key('generate_questions', 'fast', ['topic_content' => "\xFF"]),
+            cache_manager::generate_gateway_cache_key('generate_questions', 'fast', ['topic_content' => "\xFE"])
+        );
+    }
+}
@@ -0,0 +1,187 @@
+<?php
+// This file is part of Moodle - http://moodle.org/
+//
+// Moodle is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+//
+// Moodle is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with Moodle.  If not, see <https://www.gnu.org/licenses/>.
+
+namespace local_hlai_quizgen;
+
+/**
+ * Unit tests for the gateway client.
+ *
+ * @package    local_hlai_quizgen
+ * @category   test
+ * @copyright  2025 Human Logic Software LLC
+ * @license    http://www.gnu.org/copyleft/gpl.html GNU GPL v3 or later
+ * @covers     \local_hlai_quizgen\gateway_client
+ */
+final class gateway_client_test extends \advanced_testcase {
+    /**
+     * Call a private static method of gateway_client.
+     *
+     * @param string $method Method name
+     * @param array $args Arguments
+     * @return mixed
+     */
+    private function call_private(string $method, array $args) {
+        $reflection = new \ReflectionMethod(gateway_client::class, $method);
+        $reflection->setAccessible(true);
+        return $reflection->invokeArgs(null, $args);
+    }
+
+    /**
+     * Set a private static property of gateway_client.
+     *
+     * @param string $name Property name
+     * @param mixed $value Value
+     */
+    private function set_private(string $name, $value): void {
+        $reflection = new \ReflectionProperty(gateway_client::class, $name);
+        $reflection->setAccessible(true);
+        $reflection->setValue(null, $value);
+    }
+
+    /**
+     * Repeated failures open the circuit, and calls refused by it are not retryable.
+     */
+    public function test_circuit_breaker(): void {
+        $this->resetAfterTest();
+        set_config('gatewaykey', 'test-key', 'local_hlai_quizgen');
+        gateway_client::reset_caches();
+        $this->set_private('consecutivefailures', 0);
+        $this->set_private('circuitopenuntil', 0);
+
+        for ($i = 0; $i < 4; $i++) {
+            $this->call_private('record_gateway_outcome', [503]);
+        }
+        $this->assertFalse($this->call_private('is_circuit_open', []));
+
+        // A response below 500 means the gateway is up and resets the count.
+        $this->call_private('record_gateway_outcome', [400]);
+        for ($i = 0; $i < 4; $i++) {
+            $this->call_private('record_gateway_outcome', [0]);
+        }
+        $this->assertFalse($this->call_private('is_circuit_open', []));
+
+        $this->call_private('record_gateway_outcome', [0]);
+        $this->assertTrue($this->call_private('is_circuit_open', []));
+
+        try {
+            gateway_client::generate_questions(['topic_title' => 'Valves', 'topic_content' => 'Valve types.']);
+            $this->fail('An open circuit must refuse the call.');
+        } catch (gateway_exception $e) {
+            $this->assertFalse($e->retryable);
+        }
+
+        $this->set_private('circuitopenuntil', 0);
+    }
+
+    /**
+     * Data provider for test_decode_response_rejects.
+     *
+     * @return array
+     */
+    public static function decode_response_rejects_provider(): array {
+        return [
+            'html error page containing braces' => ['<html><script>var c = {"a":1};</script>Bad gateway</html>', 200],
+            'json wrapped in prose' => ['Here it is: {"content":{"questions":[]}}', 200],
+            'json with a redirect status' => ['{"content":{"questions":[{"q":1}]}}', 302],
+            'json with a server error status' => ['{"content":{"questions":[{"q":1}]}}', 503],
+        ];
+    }
+
+    /**
+     * Only a strictly valid JSON envelope with a 2xx status is accepted.
+     *
+     * @dataProvider decode_response_rejects_provider
+     * @param string $body Response body
+     * @param int $httpcode HTTP status
+     */
+    public function test_decode_response_rejects(string $body, int $httpcode): void {
+        $this->resetAfterTest();
+        $this->expectException(gateway_exception::class);
+        $this->call_private('decode_response', ['generate_questions', $body, $httpcode]);
+    }
+
+    /**
+     * A successful envelope returns its content.
+     */
+    public function test_decode_response_success(): void {
+        $this->resetAfterTest();
+        $body = '{"provider":"x","content":{"questions":[{"q":1}]}}';
+        $this->assertSame(
+            ['questions' => [['q' => 1]]],
+            $this->call_private('decode_response', ['generate_questions', $body, 200])
+        );
+    }
+
+    /**
+     * Source content is compacted and capped at the length the gateway reads.
+     */
+    public function test_truncate_payload_content(): void {
+        $payload = $this->call_private('truncate_payload_content', [[
+            'topic_title' => "Valves  \n\n\n",
+            'topic_content' => "Navigation\nGate   valves\t isolate flow.  \n\n\n\nBreadcrumb\n",
+        ]]);
+        $this->assertSame("Valves  \n\n\n", $payload['topic_title']);
+        $this->assertSame("Navigation\nGate valves isolate flow.\n\nBreadcrumb", $payload['topic_content']);
+
+        // Multi-byte content is cut by characters, not bytes.
+        $payload = $this->call_private('truncate_payload_content', [[
+            'topic_content' => str_repeat('é', 6000),
+            'content' => str_repeat("Line of course text.\n", 20000),
+        ]]);
+        $this->assertSame(str_repeat('é', 5000), $payload['topic_content']);
+        $this->assertSame(150000, \core_text::strlen($payload['content']));
+        $this->assertStringStartsWith("Line of course text.\nLine", $payload['content']);
+    }
+
+    /**
+     * Only successful replies with questions are stored in the response cache.
+     */
+    public function test_cache_response(): void {
+        $this->resetAfterTest();
+        $questions = ['questions' => [['questiontext' => 'Which valve type isolates flow?']]];
+
+        $this->call_private('cache_response', ['generate_questions', 'key_error', 502, $questions]);
+        $this->call_private('cache_response', ['generate_questions', 'key_empty', 200, ['questions' => []]]);
+        $this->call_private('cache_response', ['generate_questions', 'key_missing', 200, ['provider' => 'x']]);
+        $this->call_private('cache_response', ['generate_questions', 'key_ok', 200, $questions]);
+
+        $this->assertNull(cache_manager::get_cached_response('questions', 'key_error'));
+        $this->assertNull(cache_manager::get_cached_response('questions', 'key_empty'));
+        $this->assertNull(cache_manager::get_cached_response('questions', 'key_missing'));
+        $this->assertSame($questions, cache_manager::get_cached_response('questions', 'key_ok'));
+    }
+
+    /**
+     * Content policy rejections are marked as not worth retrying; other gateway errors are.
+     */
+    public function test_decode_response_retry_classification(): void {
+        $this->resetAfterTest();
+
+        try {
+            $this->call_private('decode_response', ['generate_questions', '{"error":"content_filter triggered"}', 400]);
+            $this->fail('A gateway error must throw.');
+        } catch (gateway_exception $e) {
+            $this->assertFalse($e->retryable);
+        }
+
+        try {
+            $this->call_private('decode_response', ['generate_questions', '{"error":"upstream timeout"}', 502]);
+            $this->fail('A gateway error must throw.');
+        } catch (gateway_exception $e) {
+            $this->assertTrue($e->retryable);
+        }
+    }
+}
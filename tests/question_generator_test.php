@@ -0,0 +1,80 @@
+<?php
+// This file is part of Moodle - http://moodle.org/
+//
+// Moodle is free software: you can redistribute it and/or modify
+// it under the terms of the GNU General Public License as published by
+// the Free Software Foundation, either version 3 of the License, or
+// (at your option) any later version.
+//
+// Moodle is distributed in the hope that it will be useful,
+// but WITHOUT ANY WARRANTY; without even the implied warranty of
+// MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+// GNU General Public License for more details.
+//
+// You should have received a copy of the GNU General Public License
+// along with Moodle.  If not, see <https://www.gnu.org/licenses/>.
+
+namespace local_hlai_quizgen;
+
+/**
+ * Unit tests for the question generator.
+ *
+ * @package    local_hlai_quizgen
+ * @category   test
+ * @copyright  2025 Human Logic Software LLC
+ * @license    http://www.gnu.org/copyleft/gpl.html GNU GPL v3 or later
+ * @covers     \local_hlai_quizgen\question_generator
+ */
+final class question_generator_test extends \advanced_testcase {
+    /**
+     * Call a private static method of question_generator.
+     *
+     * @param string $method Method name
+     * @param array $args Arguments
+     * @return mixed
+     */
+    private function call_private(string $method, array $args) {
+        $reflection = new \ReflectionMethod(question_generator::class, $method);
+        $reflection->setAccessible(true);
+        return $reflection->invokeArgs(null, $args);
+    }
+
+    /**
+     * Failures that will repeat are not retried, even when the message carries no detail.
+     */
+    public function test_retry_classification_with_debugging_off(): void {
+        $this->resetAfterTest();
+        set_debugging(DEBUG_NONE, false);
+        set_config('gatewaykey', '', 'local_hlai_quizgen');
+        gateway_client::reset_caches();
+
+        try {
+            gateway_client::generate_questions(['topic_title' => 'Valves', 'topic_content' => 'Valve types.']);
+            $this->fail('An unconfigured gateway must throw.');
+        } catch (gateway_exception $e) {
+            $this->assertFalse($this->call_private('is_retryable_error', [$e]));
+        }
+
+        $this->assertFalse($this->call_private('is_retryable_error', [new gateway_exception('Gateway error: x', false)]));
+        $this->assertTrue($this->call_private('is_retryable_error', [new gateway_exception('Gateway error (HTTP 502): x')]));
+        $other = new \moodle_exception('error:noaiprovider', 'local_hlai_quizgen');
+        $this->assertTrue($this->call_private('is_retryable_error', [$other]));
+    }
+
+    /**
+     * Prefetched questions that repeat saved ones are dropped, and their types are kept for regeneration.
+     */
+    public function test_drop_duplicate_questions(): void {
+        $saved = [(object)['questiontext' => 'Which valve type is best suited to throttling flow in a pipeline?']];
+        $batch = [
+            ['questiontype' => 'truefalse', 'questiontext' => 'Which valve type is best suited to throttling flow in a pipeline?'],
+            ['questiontype' => 'multichoice', 'questiontext' => 'What pressure rating is required for a steam isolation valve?'],
+            ['questiontype' => 'shortanswer', 'questiontext' => 'What pressure rating is required for a steam isolation valve?'],
+        ];
+
+        [$kept, $droppedtypes] = $this->call_private('drop_duplicate_questions', [$batch, $saved]);
+
+        $this->assertSame([$batch[1]], $kept);
+        $this->assertSame(['truefalse', 'shortanswer'], $droppedtypes);
+    }
+}
@@ -2351,6 +2351,16 @@ function local_hlai_quizgen_render_step4(int $courseid, int $requestid): string
         'pending' => get_string('pending', 'local_hlai_quizgen'),
     ];
 
+    // Question type label map.
+    $typelabelmap = [
+        'multichoice' => 'MCQ',
+        'truefalse' => 'True/False',
+        'shortanswer' => 'Short Answer',
+        'essay' => 'Essay',
+        'scenario' => 'Scenario',
+        'matching' => 'Matching',
+    ];
+
     $maxregens = get_config('local_hlai_quizgen', 'max_regenerations') ?: 5;
     $questionnumber = 0;
     $questionsdata = [];
@@ -2364,14 +2374,6 @@ function local_hlai_quizgen_render_step4(int $courseid, int $requestid): string
             $cardclass .= ' has-background-white-ter';
         }
 
-        $typelabelmap = [
-            'multichoice' => 'MCQ',
-            'truefalse' => 'True/False',
-            'shortanswer' => 'Short Answer',
-            'essay' => 'Essay',
-            'scenario' => 'Scenario',
-            'matching' => 'Matching',
-        ];
         $typelabel = $typelabelmap[$questiontype] ?? ucfirst($questiontype);
         $diffclass = $question->difficulty === 'easy' ? 'is-success' :
             ($question->difficulty === 'hard' ? 'is-danger' : 'is-warning');